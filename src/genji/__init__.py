@@ -17,8 +17,9 @@ Example:
 
 from __future__ import annotations
 
+from typing import TYPE_CHECKING, Any
+
 from .backends.base import AsyncGenjiBackend
-from .backends.litellm import LLMBackend
 from .backends.mock import MockBackend
 from .exceptions import (
     BackendError,
@@ -27,8 +28,12 @@ from .exceptions import (
     TemplateParseError,
     TemplateRenderError,
 )
+from .filters import RawJSON
 from .template import Template
 
+if TYPE_CHECKING:
+    from .backends.litellm import LLMBackend
+
 __version__ = "1.0.1"
 
 __all__ = [
@@ -38,6 +43,8 @@ __all__ = [
     "AsyncGenjiBackend",
     "LLMBackend",
     "MockBackend",
+    # Filters
+    "RawJSON",
     # Exceptions
     "GenjiError",
     "TemplateParseError",
@@ -47,3 +54,12 @@ __all__ = [
     # Version
     "__version__",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import LLMBackend lazily so ``import genji`` doesn't load litellm."""
+    if name == "LLMBackend":
+        from .backends.litellm import LLMBackend
+
+        return LLMBackend
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,17 +7,29 @@ from dataclasses import dataclass
 from typing import Protocol
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GenerationRequest:
-    """Request for LLM text generation."""
+    """Request for LLM text generation.
+
+    Requests are immutable and hashable; ``stop`` is stored as a tuple so
+    requests can be used directly as dedup and cache keys. A single stop
+    string is kept whole as a one-element tuple.
+    """
 
     prompt: str
     max_tokens: int | None = None
     temperature: float | None = None
     stop: Sequence[str] | None = None
 
+    def __post_init__(self) -> None:
+        if isinstance(self.stop, str):
+            # tuple() would split a string into single-character stops
+            object.__setattr__(self, "stop", (self.stop,))
+        elif self.stop is not None and not isinstance(self.stop, tuple):
+            object.__setattr__(self, "stop", tuple(self.stop))
+
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class GenerationResponse:
     """Response from LLM text generation."""
 
@@ -3,21 +3,64 @@
 from __future__ import annotations
 
 import asyncio
+import io
+import math
 import os
-from collections.abc import Sequence
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Mapping, Sequence
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any
-
-try:
-    import litellm
-except ImportError as e:
-    raise ImportError(
-        "LiteLLM is required but not installed. Install it with: pip install litellm"
-    ) from e
+from contextlib import AbstractAsyncContextManager, AbstractContextManager, nullcontext
+from types import ModuleType
+from typing import TYPE_CHECKING, Any
 
 from ..exceptions import BackendError
 from .base import GenerationRequest, GenerationResponse
 
+if TYPE_CHECKING:
+    from litellm.router import Router
+
+# litellm is slow to import, so it is loaded on first use
+_litellm: ModuleType | None = None
+
+
+def _get_litellm() -> ModuleType:
+    """Import litellm on first use and return the module.
+
+    Raises:
+        ImportError: If litellm is not installed.
+    """
+    global _litellm
+    if _litellm is None:
+        try:
+            import litellm
+        except ImportError as e:
+            raise ImportError(
+                "LiteLLM is required but not installed. "
+                "Install it with: pip install litellm"
+            ) from e
+        _litellm = litellm
+    return _litellm
+
+
+# Key identifying a completion: (model, prompt, temperature, max_tokens,
+# stop, add_system_prompt)
+_CacheKey = tuple[str | None, str, float | None, int | None, tuple[str, ...], bool]
+
+# Request-independent parts of a completion call: (settings they were built
+# from, prefix messages, base kwargs, kwargs that override user kwargs)
+_CallParts = tuple[
+    tuple[Any, ...],
+    tuple[dict[str, Any], ...],
+    dict[str, Any],
+    dict[str, Any],
+]
+
+# Matches one ``<<i>>answer<</i>>`` block in a packed completion
+_PACKED_ANSWER_RE = re.compile(r"<<(\d+)>>(.*?)<</\1>>", re.S)
+
 
 class LLMBackend:
     """LLM backend using LiteLLM for multi-provider support.
@@ -47,6 +90,15 @@ class LLMBackend:
         "Be direct and literal."
     )
 
+    PACKED_INSTRUCTION = (
+        "Answer each numbered item below independently. "
+        "Wrap every answer in tags carrying its item number, "
+        "exactly in this form:\n"
+        "<<1>>\nanswer to item 1\n<</1>>\n"
+        "<<2>>\nanswer to item 2\n<</2>>\n"
+        "Output nothing outside the tags."
+    )
+
     def __init__(
         self,
         model: str | None = None,
@@ -55,6 +107,16 @@ class LLMBackend:
         temperature: float | None = None,
         max_tokens: int | None = None,
         add_system_prompt: bool = True,
+        pack_prompts: bool = False,
+        max_concurrency: int = 10,
+        dedup: bool = True,
+        use_async_under_sync: bool = False,
+        cache_size: int = 0,
+        use_n_parameter: bool = True,
+        router: Router | None = None,
+        enable_prompt_caching: bool = False,
+        num_retries: int = 2,
+        cache_ttl: float | None = None,
         **kwargs: Any,
     ) -> None:
         """Initialize the LiteLLM backend.
@@ -70,53 +132,237 @@ class LLMBackend:
             max_tokens: Max tokens for generation. None means no limit.
             add_system_prompt: Whether to add system instruction for concise responses.
                 Defaults to True. Set to False if you want full control over prompts.
+            pack_prompts: Whether ``generate_batch``/``agenerate_batch`` should
+                pack requests that share sampling parameters into a single
+                completion call (see ``generate_packed``). Defaults to False.
+            max_concurrency: Maximum number of requests a batch keeps in
+                flight at once, in both the threaded and async paths.
+                Defaults to 10.
+            dedup: Whether batch calls send identical requests (same prompt,
+                temperature, max_tokens and stop) only once. Requests whose
+                temperature resolves to exactly 0 share one response; others
+                get distinct samples (see ``use_n_parameter``). Defaults to
+                True.
+            use_async_under_sync: Whether ``generate_batch`` should run
+                ``agenerate_batch`` on a fresh event loop instead of using a
+                thread pool. Ignored when called from a running event loop.
+                Defaults to False.
+            cache_size: Number of responses to keep in an in-memory LRU
+                cache. Only requests whose temperature resolves to exactly 0
+                are cached; None means the provider default, which samples.
+                Defaults to 0 (caching disabled).
+            use_n_parameter: Whether duplicated requests whose temperature
+                does not resolve to 0 (including the provider default) are
+                served by one call with ``n`` set to the number of
+                duplicates, so each gets a distinct sample. When False, or
+                when the provider rejects ``n``, they are sent as separate
+                calls. Only applies when ``dedup`` is enabled. Defaults to
+                True.
+            router: Optional ``litellm.Router``. When set, completions are
+                dispatched through ``router.completion``/``router.acompletion``
+                for load balancing across deployments; ``model`` then names
+                the router's model group.
+            enable_prompt_caching: Whether to pass ``caching=True`` to litellm
+                and, for ``anthropic/`` models, mark the system prompt with
+                ``cache_control`` so the provider can cache it as a prefix.
+                Defaults to False.
+            num_retries: Number of times litellm retries a failed call
+                (with exponential backoff) before giving up. Defaults to 2.
+            cache_ttl: Seconds a cached response stays valid when
+                ``cache_size`` is set. None keeps entries until they are
+                evicted. Defaults to None.
             **kwargs: Additional arguments to pass to litellm.completion().
 
         Raises:
-            ValueError: If model is not provided and GENJI_MODEL is not set.
+            ValueError: If model is not provided and GENJI_MODEL is not set,
+                or if max_concurrency is less than 1.
         """
-        self.model = model or os.getenv("GENJI_MODEL")
-        if not self.model:
+        resolved_model = model or os.getenv("GENJI_MODEL")
+        if not resolved_model:
             raise ValueError(
                 "Model name is required. Either pass model= parameter or "
                 "set GENJI_MODEL environment variable."
             )
+        self.model = resolved_model
         self.api_key = api_key or os.getenv("GENJI_API_KEY")
         self.base_url = base_url or os.getenv("GENJI_BASE_URL")
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.add_system_prompt = add_system_prompt
+        self.pack_prompts = pack_prompts
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self.max_concurrency = max_concurrency
+        self.dedup = dedup
+        self.use_async_under_sync = use_async_under_sync
+        self.cache_size = cache_size
+        self.use_n_parameter = use_n_parameter
+        self.router = router
+        self.enable_prompt_caching = enable_prompt_caching
+        self.num_retries = num_retries
+        self.cache_ttl = cache_ttl
+        # Cached responses with their monotonic expiry time
+        self._cache: OrderedDict[_CacheKey, tuple[GenerationResponse, float]] = (
+            OrderedDict()
+        )
+        self._cache_lock = threading.Lock()
+        # Models whose provider rejected the ``n`` parameter
+        self._models_without_n: set[str] = set()
         self.kwargs = kwargs
+        # Request-independent parts of every completion call, keyed by the
+        # settings they were built from
+        self._call_parts: _CallParts | None = None
+
+    def _get_call_parts(self) -> _CallParts:
+        """Return the request-independent parts of a completion call.
+
+        They are rebuilt only when one of the settings they derive from has
+        been reassigned since the last call.
+        """
+        settings = (
+            self.model,
+            self.api_key,
+            self.base_url,
+            self.add_system_prompt,
+            self.enable_prompt_caching,
+            self.num_retries,
+        )
+        parts = self._call_parts
+        if parts is not None and parts[0] == settings:
+            return parts
+
+        system_content: str | list[dict[str, Any]] = self.SYSTEM_INSTRUCTION
+        if self.enable_prompt_caching and self.model.startswith("anthropic/"):
+            system_content = [
+                {
+                    "type": "text",
+                    "text": self.SYSTEM_INSTRUCTION,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+        prefix_messages: tuple[dict[str, Any], ...] = (
+            ({"role": "system", "content": system_content},)
+            if self.add_system_prompt
+            else ()
+        )
+        base_kwargs = {"model": self.model, "num_retries": self.num_retries}
+        # Applied after ``kwargs`` so they take precedence over it
+        overrides: dict[str, Any] = {}
+        if self.enable_prompt_caching:
+            overrides["caching"] = True
+        if self.api_key:
+            overrides["api_key"] = self.api_key
+        if self.base_url:
+            overrides["api_base"] = self.base_url
+
+        parts = (settings, prefix_messages, base_kwargs, overrides)
+        self._call_parts = parts
+        return parts
+
+    def _completion(self, **litellm_kwargs: Any) -> Any:
+        """Call litellm (or the configured router) synchronously."""
+        if self.router is not None:
+            return self.router.completion(**litellm_kwargs)
+        return _get_litellm().completion(**litellm_kwargs)
+
+    async def _acompletion(self, **litellm_kwargs: Any) -> Any:
+        """Call litellm (or the configured router) asynchronously."""
+        if self.router is not None:
+            return await self.router.acompletion(**litellm_kwargs)
+        return await _get_litellm().acompletion(**litellm_kwargs)
+
+    @staticmethod
+    def _hold(limit: threading.Semaphore | None) -> AbstractContextManager[Any]:
+        """Context manager holding a batch's concurrency slot, if any."""
+        return limit if limit is not None else nullcontext()
+
+    @staticmethod
+    def _ahold(limit: asyncio.Semaphore | None) -> AbstractAsyncContextManager[Any]:
+        """Async context manager holding a batch's concurrency slot, if any."""
+        return limit if limit is not None else nullcontext()
+
+    @staticmethod
+    def _rejects_n(error: Exception) -> bool:
+        """Whether a completion failed because the provider does not support n."""
+        return isinstance(error, _get_litellm().UnsupportedParamsError)
+
+    def _resolve_sampling(
+        self, request: GenerationRequest
+    ) -> tuple[float | None, int | None]:
+        """Resolve the effective temperature and max_tokens for a request."""
+        return (
+            request.temperature
+            if request.temperature is not None
+            else self.temperature,
+            request.max_tokens if request.max_tokens is not None else self.max_tokens,
+        )
+
+    def _is_deterministic(self, request: GenerationRequest) -> bool:
+        """Whether a request's resolved temperature is exactly 0.
+
+        None means the provider's default temperature, which samples, so
+        only an explicit 0 makes identical requests interchangeable.
+        """
+        temperature, _ = self._resolve_sampling(request)
+        return temperature == 0
+
+    def _cache_key(self, request: GenerationRequest) -> _CacheKey | None:
+        """Build the response cache key, or None if the request is uncacheable."""
+        if not self.cache_size or not self._is_deterministic(request):
+            return None
+        temperature, max_tokens = self._resolve_sampling(request)
+        return (
+            self.model,
+            request.prompt,
+            temperature,
+            max_tokens,
+            tuple(request.stop or ()),
+            self.add_system_prompt,
+        )
+
+    def _cache_get(self, key: _CacheKey) -> GenerationResponse | None:
+        """Look up a cached response, marking it as recently used."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            response, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return response
+
+    def _cache_put(self, key: _CacheKey, response: GenerationResponse) -> None:
+        """Store a response, evicting the least recently used entries."""
+        expires_at = (
+            math.inf if self.cache_ttl is None else time.monotonic() + self.cache_ttl
+        )
+        with self._cache_lock:
+            self._cache[key] = (response, expires_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
 
     def _build_litellm_kwargs(self, request: GenerationRequest) -> dict[str, Any]:
         """Build the keyword arguments dict for a litellm completion call."""
-        messages: list[dict[str, str]] = []
-        if self.add_system_prompt:
-            messages.append({"role": "system", "content": self.SYSTEM_INSTRUCTION})
-        messages.append({"role": "user", "content": request.prompt})
-
+        _, prefix_messages, base_kwargs, overrides = self._get_call_parts()
         litellm_kwargs: dict[str, Any] = {
-            "model": self.model,
-            "messages": messages,
+            **base_kwargs,
             **self.kwargs,
+            **overrides,
+            "messages": [*prefix_messages, {"role": "user", "content": request.prompt}],
         }
 
-        temperature_value = request.temperature or self.temperature
+        temperature_value, max_tokens_value = self._resolve_sampling(request)
         if temperature_value is not None:
             litellm_kwargs["temperature"] = temperature_value
 
-        max_tokens_value = request.max_tokens or self.max_tokens
         if max_tokens_value is not None:
             litellm_kwargs["max_tokens"] = max_tokens_value
 
-        if self.api_key:
-            litellm_kwargs["api_key"] = self.api_key
-
-        if self.base_url:
-            litellm_kwargs["api_base"] = self.base_url
-
         if request.stop:
-            litellm_kwargs["stop"] = request.stop
+            litellm_kwargs["stop"] = list(request.stop)
 
         return litellm_kwargs
 
@@ -124,23 +370,192 @@ class LLMBackend:
     def _parse_response(response: Any) -> GenerationResponse:
         """Extract a GenerationResponse from a litellm response object."""
         choice = response.choices[0]
-        text = choice.message.content or ""
-        finish_reason = choice.finish_reason
-
-        usage = None
-        if hasattr(response, "usage") and response.usage:
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
+        usage_obj = getattr(response, "usage", None)
+        usage = (
+            {
+                "prompt_tokens": usage_obj.prompt_tokens,
+                "completion_tokens": usage_obj.completion_tokens,
+                "total_tokens": usage_obj.total_tokens,
             }
+            if usage_obj
+            else None
+        )
 
         return GenerationResponse(
-            text=text,
-            finish_reason=finish_reason,
+            text=choice.message.content or "",
+            finish_reason=choice.finish_reason,
             usage=usage,
         )
 
+    @staticmethod
+    def _parse_choices(response: Any) -> list[GenerationResponse]:
+        """Extract one GenerationResponse per choice of a multi-sample response.
+
+        Token usage covers the whole call and is attached to the first
+        response only.
+        """
+        first = LLMBackend._parse_response(response)
+        return [first] + [
+            GenerationResponse(
+                text=choice.message.content or "",
+                finish_reason=choice.finish_reason,
+            )
+            for choice in response.choices[1:]
+        ]
+
+    def _sample_counts(
+        self,
+        unique: Sequence[GenerationRequest],
+        positions: list[int] | None,
+    ) -> dict[int, int]:
+        """Find deduplicated requests that should get distinct samples.
+
+        Returns:
+            Mapping of position in ``unique`` to the number of samples
+            needed, for requests that occur more than once and are not
+            deterministic.
+        """
+        if positions is None or not self.use_n_parameter:
+            return {}
+        counts: dict[int, int] = {}
+        for position in positions:
+            counts[position] = counts.get(position, 0) + 1
+        sampled = {}
+        for position, count in counts.items():
+            if count > 1 and not self._is_deterministic(unique[position]):
+                sampled[position] = count
+        return sampled
+
+    def _deduplicate(
+        self, requests: Sequence[GenerationRequest]
+    ) -> tuple[Sequence[GenerationRequest], list[int] | None]:
+        """Collapse identical requests.
+
+        Without ``use_n_parameter``, only deterministic requests are
+        collapsed; the rest stay separate so each gets its own sample.
+
+        Returns:
+            Tuple of (unique requests, position of each original request in
+            the unique list). Positions are None when there were no duplicates.
+        """
+        request_to_position: dict[GenerationRequest, int] = {}
+        unique: list[GenerationRequest] = []
+        positions: list[int] = []
+        collapse_all = self.use_n_parameter
+        for req in requests:
+            if not collapse_all and not self._is_deterministic(req):
+                positions.append(len(unique))
+                unique.append(req)
+                continue
+            position = request_to_position.get(req)
+            if position is None:
+                position = request_to_position[req] = len(unique)
+                unique.append(req)
+            positions.append(position)
+
+        if len(unique) == len(requests):
+            return requests, None
+        return unique, positions
+
+    @staticmethod
+    def _fan_out(
+        responses: Sequence[GenerationResponse],
+        positions: list[int] | None,
+        samples: Mapping[int, Sequence[GenerationResponse]] | None = None,
+    ) -> Sequence[GenerationResponse]:
+        """Map responses for unique requests back onto the original requests.
+
+        Args:
+            responses: Responses for the unique requests, skipping those
+                answered by ``samples``.
+            positions: Position of each original request among the unique
+                requests, or None if there were no duplicates.
+            samples: Distinct samples for sampled unique requests, handed
+                out in order to each duplicate.
+        """
+        if positions is None:
+            return responses
+        if not samples:
+            return [responses[p] for p in positions]
+
+        draws = {p: iter(s) for p, s in samples.items()}
+        slots: dict[int, int] = {}
+        fanned = []
+        for p in positions:
+            if p in draws:
+                fanned.append(next(draws[p]))
+            else:
+                fanned.append(responses[slots.setdefault(p, len(slots))])
+        return fanned
+
+    @staticmethod
+    def _raise_batch_errors(errors: Mapping[int, Exception], total: int) -> None:
+        """Raise one BackendError summarizing every failed request in a batch.
+
+        Raises:
+            BackendError: If any request failed.
+        """
+        if not errors:
+            return
+        details = "; ".join(f"request {i}: {e}" for i, e in sorted(errors.items()))
+        raise BackendError(
+            f"Batch generation failed for {len(errors)} of {total} requests: {details}"
+        ) from errors[min(errors)]
+
+    @staticmethod
+    def _group_for_packing(
+        requests: Sequence[GenerationRequest],
+    ) -> list[list[int]]:
+        """Group request indices by their sampling parameters."""
+        groups: dict[
+            tuple[float | None, int | None, Sequence[str] | None], list[int]
+        ] = {}
+        for i, req in enumerate(requests):
+            key = (req.temperature, req.max_tokens, req.stop or None)
+            groups.setdefault(key, []).append(i)
+        return list(groups.values())
+
+    def _pack_requests(self, group: Sequence[GenerationRequest]) -> GenerationRequest:
+        """Combine requests with identical sampling parameters into one request.
+
+        Stop sequences are not forwarded since they would cut the packed
+        completion short; they are applied per answer when unpacking.
+        """
+        items = "\n".join(f"{i}. {req.prompt}" for i, req in enumerate(group, 1))
+        first = group[0]
+        _, max_tokens = self._resolve_sampling(first)
+        return GenerationRequest(
+            prompt=f"{self.PACKED_INSTRUCTION}\n\nItems:\n{items}",
+            max_tokens=max_tokens * len(group) if max_tokens is not None else None,
+            temperature=first.temperature,
+        )
+
+    @staticmethod
+    def _unpack_response(
+        response: GenerationResponse, group: Sequence[GenerationRequest]
+    ) -> list[GenerationResponse] | None:
+        """Split a packed completion into one response per request.
+
+        Returns:
+            The per-request responses, or None if any answer is missing.
+        """
+        answers: dict[int, str] = {}
+        for match in _PACKED_ANSWER_RE.finditer(response.text):
+            answers.setdefault(int(match.group(1)), match.group(2).strip())
+
+        if any(i not in answers for i in range(1, len(group) + 1)):
+            return None
+
+        unpacked = []
+        for i, req in enumerate(group, 1):
+            text = answers[i]
+            for stop in req.stop or ():
+                text = text.split(stop, 1)[0]
+            unpacked.append(
+                GenerationResponse(text=text, finish_reason=response.finish_reason)
+            )
+        return unpacked
+
     # ------------------------------------------------------------------
     # Synchronous API
     # ------------------------------------------------------------------
@@ -157,20 +572,124 @@ class LLMBackend:
         Raises:
             BackendError: If generation fails.
         """
+        return self._generate(request, None)
+
+    def _generate(
+        self, request: GenerationRequest, limit: threading.Semaphore | None
+    ) -> GenerationResponse:
+        """Generate a single completion, holding ``limit`` while it is in flight."""
+        key = self._cache_key(request)
+        if key is not None:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
         litellm_kwargs = self._build_litellm_kwargs(request)
         try:
-            response = litellm.completion(**litellm_kwargs)
-            return self._parse_response(response)
+            with self._hold(limit):
+                raw = self._completion(**litellm_kwargs)
+            response = self._parse_response(raw)
         except BackendError:
             raise
         except Exception as e:
             raise BackendError(f"LiteLLM generation failed: {e}") from e
 
+        if key is not None:
+            self._cache_put(key, response)
+        return response
+
+    def _generate_samples(
+        self, request: GenerationRequest, n: int, limit: threading.Semaphore
+    ) -> list[GenerationResponse]:
+        """Generate ``n`` distinct samples for one request in a single call.
+
+        Providers that return fewer choices than requested are topped up
+        with individual calls, and those that reject ``n`` get ``n``
+        individual calls.
+        """
+        samples: list[GenerationResponse] = []
+        if self.model not in self._models_without_n:
+            litellm_kwargs = self._build_litellm_kwargs(request)
+            litellm_kwargs["n"] = n
+            try:
+                with self._hold(limit):
+                    raw = self._completion(**litellm_kwargs)
+                samples = self._parse_choices(raw)[:n]
+            except Exception as e:
+                if not self._rejects_n(e):
+                    raise BackendError(f"LiteLLM generation failed: {e}") from e
+                self._models_without_n.add(self.model)
+        samples.extend(self._generate_threaded([request] * (n - len(samples)), limit))
+        return samples
+
     def generate_batch(
         self, requests: Sequence[GenerationRequest]
     ) -> Sequence[GenerationResponse]:
         """Generate multiple completions in parallel using threads.
 
+        Identical requests are sent once unless ``dedup`` is disabled; unless
+        their temperature resolves to exactly 0 they are served by one call
+        with ``n`` samples instead (see ``use_n_parameter``). When
+        ``pack_prompts`` is enabled, requests are dispatched through
+        ``generate_packed`` instead. When ``use_async_under_sync`` is enabled
+        and no event loop is running, the batch is delegated to
+        ``agenerate_batch`` via ``asyncio.run``.
+
+        Args:
+            requests: Sequence of generation requests.
+
+        Returns:
+            Sequence of generation responses in the same order.
+
+        Raises:
+            BackendError: If any generation fails.
+        """
+        if self.use_async_under_sync and len(requests) > 1:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self.agenerate_batch(requests))
+
+        unique, positions = (
+            self._deduplicate(requests) if self.dedup else (requests, None)
+        )
+        sampled = self._sample_counts(unique, positions)
+        # One slot pool shared by every call the batch makes
+        limit = threading.Semaphore(self.max_concurrency)
+        if not sampled:
+            return self._fan_out(self._dispatch(unique, limit), positions)
+
+        plain = [r for i, r in enumerate(unique) if i not in sampled]
+        with ThreadPoolExecutor(
+            max_workers=min(len(sampled), self.max_concurrency)
+        ) as executor:
+            sample_futures = {
+                i: executor.submit(self._generate_samples, unique[i], n, limit)
+                for i, n in sampled.items()
+            }
+            responses = self._dispatch(plain, limit)
+            samples = {i: f.result() for i, f in sample_futures.items()}
+        return self._fan_out(responses, positions, samples)
+
+    def _dispatch(
+        self, requests: Sequence[GenerationRequest], limit: threading.Semaphore
+    ) -> Sequence[GenerationResponse]:
+        """Send deduplicated requests, packed or one call each."""
+        if self.pack_prompts and len(requests) > 1:
+            return self._generate_packed(requests, limit)
+        return self._generate_threaded(requests, limit)
+
+    def generate_packed(
+        self, requests: Sequence[GenerationRequest]
+    ) -> Sequence[GenerationResponse]:
+        """Generate completions by packing compatible requests into single calls.
+
+        Requests sharing the same temperature, max_tokens and stop sequences
+        are answered by one completion call with numbered delimiters, which
+        amortizes the system prompt and network round-trip across the group.
+        Groups whose response cannot be split back into one answer per
+        request fall back to individual calls.
+
         Args:
             requests: Sequence of generation requests.
 
@@ -180,28 +699,82 @@ class LLMBackend:
         Raises:
             BackendError: If any generation fails.
         """
+        return self._generate_packed(
+            requests, threading.Semaphore(self.max_concurrency)
+        )
+
+    def _generate_packed(
+        self, requests: Sequence[GenerationRequest], limit: threading.Semaphore
+    ) -> Sequence[GenerationResponse]:
+        """Pack and send requests, sharing ``limit`` across every call."""
+        if not requests:
+            return []
+
+        groups = self._group_for_packing(requests)
+        with ThreadPoolExecutor(
+            max_workers=min(len(groups), self.max_concurrency)
+        ) as executor:
+            results = list(
+                executor.map(
+                    lambda indices: self._generate_group(
+                        [requests[i] for i in indices], limit
+                    ),
+                    groups,
+                )
+            )
+
+        responses: list[GenerationResponse | None] = [None] * len(requests)
+        for indices, group_responses in zip(groups, results):
+            for i, response in zip(indices, group_responses):
+                responses[i] = response
+
+        return [r for r in responses if r is not None]
+
+    def _generate_group(
+        self, group: Sequence[GenerationRequest], limit: threading.Semaphore
+    ) -> Sequence[GenerationResponse]:
+        """Answer one packing group, falling back to individual calls."""
+        if len(group) == 1:
+            return [self._generate(group[0], limit)]
+        packed = self._generate(self._pack_requests(group), limit)
+        unpacked = self._unpack_response(packed, group)
+        if unpacked is not None:
+            return unpacked
+        return self._generate_threaded(group, limit)
+
+    def _generate_threaded(
+        self, requests: Sequence[GenerationRequest], limit: threading.Semaphore
+    ) -> Sequence[GenerationResponse]:
+        """Generate one completion per request in parallel using threads.
+
+        Every request runs to completion before failures are reported
+        together.
+        """
         if not requests:
             return []
 
         if len(requests) == 1:
-            return [self.generate(requests[0])]
+            return [self._generate(requests[0], limit)]
 
         responses: list[GenerationResponse | None] = [None] * len(requests)
 
-        with ThreadPoolExecutor(max_workers=min(len(requests), 10)) as executor:
+        with ThreadPoolExecutor(
+            max_workers=min(len(requests), self.max_concurrency)
+        ) as executor:
             future_to_index = {
-                executor.submit(self.generate, req): i for i, req in enumerate(requests)
+                executor.submit(self._generate, req, limit): i
+                for i, req in enumerate(requests)
             }
 
+            errors: dict[int, Exception] = {}
             for future in as_completed(future_to_index):
                 index = future_to_index[future]
                 try:
                     responses[index] = future.result()
                 except Exception as e:
-                    raise BackendError(
-                        f"Batch generation failed for request {index}: {e}"
-                    ) from e
+                    errors[index] = e
 
+        self._raise_batch_errors(errors, len(requests))
         return [r for r in responses if r is not None]
 
     # ------------------------------------------------------------------
@@ -220,20 +793,125 @@ class LLMBackend:
         Raises:
             BackendError: If generation fails.
         """
+        return await self._agenerate(request, None)
+
+    async def _agenerate(
+        self, request: GenerationRequest, limit: asyncio.Semaphore | None
+    ) -> GenerationResponse:
+        """Generate a single completion, holding ``limit`` while it is in flight."""
+        key = self._cache_key(request)
+        if key is not None:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
         litellm_kwargs = self._build_litellm_kwargs(request)
         try:
-            response = await litellm.acompletion(**litellm_kwargs)
-            return self._parse_response(response)
+            async with self._ahold(limit):
+                raw = await self._acompletion(**litellm_kwargs)
+            response = self._parse_response(raw)
         except BackendError:
             raise
         except Exception as e:
             raise BackendError(f"LiteLLM generation failed: {e}") from e
 
+        if key is not None:
+            self._cache_put(key, response)
+        return response
+
+    async def _agenerate_samples(
+        self, request: GenerationRequest, n: int, limit: asyncio.Semaphore
+    ) -> list[GenerationResponse]:
+        """Generate ``n`` distinct samples for one request asynchronously."""
+        samples: list[GenerationResponse] = []
+        if self.model not in self._models_without_n:
+            litellm_kwargs = self._build_litellm_kwargs(request)
+            litellm_kwargs["n"] = n
+            try:
+                async with self._ahold(limit):
+                    raw = await self._acompletion(**litellm_kwargs)
+                samples = self._parse_choices(raw)[:n]
+            except Exception as e:
+                if not self._rejects_n(e):
+                    raise BackendError(f"LiteLLM generation failed: {e}") from e
+                self._models_without_n.add(self.model)
+        samples.extend(
+            await self._agenerate_gathered([request] * (n - len(samples)), limit)
+        )
+        return samples
+
+    async def _astream(
+        self, request: GenerationRequest
+    ) -> AsyncIterator[tuple[str, str | None]]:
+        """Stream (text, finish_reason) pairs from a streaming completion."""
+        litellm_kwargs = self._build_litellm_kwargs(request)
+        litellm_kwargs["stream"] = True
+        try:
+            stream = await self._acompletion(**litellm_kwargs)
+            async for chunk in stream:
+                choice = chunk.choices[0]
+                yield choice.delta.content or "", choice.finish_reason
+        except BackendError:
+            raise
+        except Exception as e:
+            raise BackendError(f"LiteLLM generation failed: {e}") from e
+
+    async def agenerate_stream(self, request: GenerationRequest) -> AsyncIterator[str]:
+        """Stream a single completion as it is generated.
+
+        Args:
+            request: The generation request.
+
+        Yields:
+            Non-empty text chunks in the order they arrive.
+
+        Raises:
+            BackendError: If generation fails.
+        """
+        async for content, _ in self._astream(request):
+            if content:
+                yield content
+
+    async def agenerate_streaming(
+        self,
+        request: GenerationRequest,
+        on_chunk: Callable[[str], None] | None = None,
+    ) -> GenerationResponse:
+        """Generate a single completion by streaming it.
+
+        Args:
+            request: The generation request.
+            on_chunk: Optional callback invoked with each text chunk as it
+                arrives.
+
+        Returns:
+            The generation response with the full streamed text.
+
+        Raises:
+            BackendError: If generation fails.
+        """
+        buffer = io.StringIO()
+        finish_reason = None
+        async for content, chunk_finish_reason in self._astream(request):
+            if content:
+                buffer.write(content)
+                if on_chunk is not None:
+                    on_chunk(content)
+            if chunk_finish_reason is not None:
+                finish_reason = chunk_finish_reason
+        return GenerationResponse(text=buffer.getvalue(), finish_reason=finish_reason)
+
     async def agenerate_batch(
         self, requests: Sequence[GenerationRequest]
     ) -> Sequence[GenerationResponse]:
         """Generate multiple completions concurrently with asyncio.gather.
 
+        At most ``max_concurrency`` requests are in flight at once and
+        identical requests are sent once unless ``dedup`` is disabled (or
+        sampled with ``n``, see ``generate_batch``). When
+        ``pack_prompts`` is enabled, requests are dispatched through
+        ``agenerate_packed`` instead.
+
         Args:
             requests: Sequence of generation requests.
 
@@ -243,10 +921,106 @@ class LLMBackend:
         Raises:
             BackendError: If any generation fails.
         """
+        unique, positions = (
+            self._deduplicate(requests) if self.dedup else (requests, None)
+        )
+        sampled = self._sample_counts(unique, positions)
+        # One slot pool shared by every call the batch makes
+        limit = asyncio.Semaphore(self.max_concurrency)
+        if not sampled:
+            return self._fan_out(await self._adispatch(unique, limit), positions)
+
+        plain = [r for i, r in enumerate(unique) if i not in sampled]
+        responses, *sample_lists = await asyncio.gather(
+            self._adispatch(plain, limit),
+            *(self._agenerate_samples(unique[i], n, limit) for i, n in sampled.items()),
+        )
+        samples = dict(zip(sampled, sample_lists))
+        return self._fan_out(responses, positions, samples)
+
+    async def _adispatch(
+        self, requests: Sequence[GenerationRequest], limit: asyncio.Semaphore
+    ) -> Sequence[GenerationResponse]:
+        """Send deduplicated requests asynchronously, packed or one call each."""
+        if self.pack_prompts and len(requests) > 1:
+            return await self._agenerate_packed(requests, limit)
+        return await self._agenerate_gathered(requests, limit)
+
+    async def agenerate_packed(
+        self, requests: Sequence[GenerationRequest]
+    ) -> Sequence[GenerationResponse]:
+        """Generate completions asynchronously by packing compatible requests.
+
+        See ``generate_packed`` for the packing behaviour.
+
+        Args:
+            requests: Sequence of generation requests.
+
+        Returns:
+            Sequence of generation responses in the same order.
+
+        Raises:
+            BackendError: If any generation fails.
+        """
+        return await self._agenerate_packed(
+            requests, asyncio.Semaphore(self.max_concurrency)
+        )
+
+    async def _agenerate_packed(
+        self, requests: Sequence[GenerationRequest], limit: asyncio.Semaphore
+    ) -> Sequence[GenerationResponse]:
+        """Pack and send requests, sharing ``limit`` across every call."""
+
+        async def _one_group(
+            group: Sequence[GenerationRequest],
+        ) -> Sequence[GenerationResponse]:
+            if len(group) == 1:
+                return [await self._agenerate(group[0], limit)]
+            packed = await self._agenerate(self._pack_requests(group), limit)
+            unpacked = self._unpack_response(packed, group)
+            if unpacked is not None:
+                return unpacked
+            return await self._agenerate_gathered(group, limit)
+
+        groups = self._group_for_packing(requests)
+        results = await asyncio.gather(
+            *(_one_group([requests[i] for i in indices]) for indices in groups)
+        )
+
+        responses: list[GenerationResponse | None] = [None] * len(requests)
+        for indices, group_responses in zip(groups, results):
+            for i, response in zip(indices, group_responses):
+                responses[i] = response
+
+        return [r for r in responses if r is not None]
+
+    async def _agenerate_gathered(
+        self, requests: Sequence[GenerationRequest], limit: asyncio.Semaphore
+    ) -> Sequence[GenerationResponse]:
+        """Generate one completion per request, bounded by ``limit``.
+
+        Every request runs to completion before failures are reported
+        together.
+        """
         if not requests:
             return []
 
         if len(requests) == 1:
-            return [await self.agenerate(requests[0])]
+            return [await self._agenerate(requests[0], limit)]
+
+        results = await asyncio.gather(
+            *(self._agenerate(r, limit) for r in requests), return_exceptions=True
+        )
+
+        responses: list[GenerationResponse] = []
+        errors: dict[int, Exception] = {}
+        for index, result in enumerate(results):
+            if isinstance(result, GenerationResponse):
+                responses.append(result)
+            elif isinstance(result, Exception):
+                errors[index] = result
+            else:
+                raise result
 
-        return list(await asyncio.gather(*(self.agenerate(r) for r in requests)))
+        self._raise_batch_errors(errors, len(requests))
+        return responses
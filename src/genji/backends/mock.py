@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 from collections.abc import Callable, Sequence
 
 from .base import GenerationRequest, GenerationResponse
@@ -18,6 +19,7 @@ class MockBackend:
         self,
         response_fn: Callable[[str], str] | None = None,
         default_response: str | None = None,
+        cache: bool = False,
     ) -> None:
         """Initialize the mock backend.
 
@@ -26,9 +28,20 @@ class MockBackend:
                 If None, uses default_response or echoes the prompt.
             default_response: Default response to return if response_fn is None.
                 If both are None, echoes "[MOCK: {prompt}]".
+            cache: Memoize response_fn by prompt (up to 1024 prompts), for
+                response functions that are deterministic but expensive.
+                Requests are still recorded on every call.
         """
-        self._response_fn = response_fn
-        self._default_response = default_response
+        if cache and response_fn is not None:
+            response_fn = functools.lru_cache(maxsize=1024)(response_fn)
+        # Pick the response source once rather than branching on every call
+        self._respond: Callable[[str], str]
+        if response_fn is not None:
+            self._respond = response_fn
+        elif default_response is not None:
+            self._respond = lambda _prompt: default_response
+        else:
+            self._respond = lambda prompt: f"[MOCK: {prompt}]"
         self.call_count = 0
         self.last_request: GenerationRequest | None = None
         self.all_requests: list[GenerationRequest] = []
@@ -46,13 +59,7 @@ class MockBackend:
         self.last_request = request
         self.all_requests.append(request)
 
-        if self._response_fn:
-            text = self._response_fn(request.prompt)
-        elif self._default_response is not None:
-            text = self._default_response
-        else:
-            text = f"[MOCK: {request.prompt}]"
-
+        text = self._respond(request.prompt)
         return GenerationResponse(
             text=text,
             finish_reason="stop",
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import re
+import secrets
+import sys
+from collections.abc import Sequence
 from contextvars import ContextVar
-from dataclasses import dataclass, field
 from typing import Any
 
 from .backends.base import GenerationRequest
@@ -13,17 +16,59 @@ _render_context: ContextVar[RenderContext | None] = ContextVar(
     "genji_render_context", default=None
 )
 
+# Placeholders carry a random per-process tag so they cannot collide with
+# template text. They use only uppercase letters, digits and underscores so
+# they pass through escaping filters like ``tojson`` and ``urlencode`` intact
+_PLACEHOLDER_PREFIX = f"__GENJI_{secrets.token_hex(8).upper()}_"
+_PLACEHOLDER_SUFFIX = "__"
+
+# Interned placeholder strings for the first gen() calls of a render
+_PLACEHOLDER_TABLE_SIZE = 256
+_PLACEHOLDERS = tuple(
+    sys.intern(f"{_PLACEHOLDER_PREFIX}{i}{_PLACEHOLDER_SUFFIX}")
+    for i in range(_PLACEHOLDER_TABLE_SIZE)
+)
+
+# Matches any placeholder produced by collect_prompt
+_PLACEHOLDER_RE = re.compile(
+    re.escape(_PLACEHOLDER_PREFIX) + r"(\d+)" + re.escape(_PLACEHOLDER_SUFFIX)
+)
+
+# Released contexts kept for reuse by later renders
+_context_pool: list[RenderContext] = []
+_CONTEXT_POOL_SIZE = 16
+
 
-@dataclass
 class CollectedPrompt:
     """A prompt collected during the collection phase."""
 
-    placeholder: str
-    prompt: str
-    source_id: int | None = None
-    max_tokens: int | None = None
-    temperature: float | None = None
-    stop: list[str] | None = None
+    __slots__ = (
+        "index",
+        "placeholder",
+        "prompt",
+        "source_id",
+        "max_tokens",
+        "temperature",
+        "stop",
+    )
+
+    def __init__(
+        self,
+        index: int,
+        placeholder: str,
+        prompt: str,
+        source_id: int | None = None,
+        max_tokens: int | None = None,
+        temperature: float | None = None,
+        stop: list[str] | None = None,
+    ) -> None:
+        self.index = index
+        self.placeholder = placeholder
+        self.prompt = prompt
+        self.source_id = source_id
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.stop = stop
 
     def to_request(self) -> GenerationRequest:
         """Convert to a GenerationRequest."""
@@ -35,7 +80,11 @@ class CollectedPrompt:
         )
 
 
-@dataclass
+# Fillers for pre-sized RenderContext slots not yet collected
+_UNSET_PROMPT = CollectedPrompt(index=-1, placeholder="", prompt="")
+_UNSET_REQUEST = GenerationRequest(prompt="")
+
+
 class RenderContext:
     """Context for a single render operation.
 
@@ -43,17 +92,48 @@ class RenderContext:
     Each render() call gets its own isolated context.
     """
 
-    # Counter for generating unique placeholder IDs
-    counter: int = 0
+    def __init__(
+        self,
+        variables: dict[str, Any] | None = None,
+        expected_prompts: int = 0,
+    ) -> None:
+        """Initialize a render context.
+
+        Args:
+            variables: Template variables.
+            expected_prompts: Number of gen() calls the template is expected
+                to make, used to pre-size prompt storage.
+        """
+        # Counter for generating unique placeholder IDs
+        self.counter = 0
+
+        # List of prompts collected during the first pass
+        self.prompts: list[CollectedPrompt] = []
 
-    # List of prompts collected during the first pass
-    prompts: list[CollectedPrompt] = field(default_factory=list)
+        # Backend requests for the collected prompts, built as they arrive
+        self.requests: list[GenerationRequest] = []
 
-    # Mapping from placeholder to generated content
-    generated: dict[str, str] = field(default_factory=dict)
+        # Generated content indexed by prompt index (None until generated)
+        self.generated: list[str | None] = []
 
-    # Template variables
-    variables: dict[str, Any] = field(default_factory=dict)
+        # Template variables
+        self.variables: dict[str, Any] = variables if variables is not None else {}
+
+        self.reserve(expected_prompts)
+
+    def reserve(self, expected_prompts: int) -> None:
+        """Pre-size prompt storage for the expected number of gen() calls.
+
+        Unused slots are dropped by ``finish_collection``.
+
+        Args:
+            expected_prompts: Number of prompts to make room for.
+        """
+        missing = expected_prompts - len(self.prompts)
+        if missing > 0:
+            self.prompts += [_UNSET_PROMPT] * missing
+            self.requests += [_UNSET_REQUEST] * missing
+            self.generated += [None] * missing
 
     def collect_prompt(
         self,
@@ -75,10 +155,17 @@ class RenderContext:
         Returns:
             A unique placeholder string.
         """
-        placeholder = f"__GENJI_GEN_{self.counter}__"
-        self.counter += 1
+        counter = self.counter
+        if counter < _PLACEHOLDER_TABLE_SIZE:
+            placeholder = _PLACEHOLDERS[counter]
+        else:
+            placeholder = sys.intern(
+                f"{_PLACEHOLDER_PREFIX}{counter}{_PLACEHOLDER_SUFFIX}"
+            )
+        self.counter = counter + 1
 
         collected = CollectedPrompt(
+            index=counter,
             placeholder=placeholder,
             prompt=prompt,
             source_id=source_id,
@@ -86,32 +173,89 @@ class RenderContext:
             temperature=temperature,
             stop=stop,
         )
-        self.prompts.append(collected)
+        # Built from the arguments directly rather than via to_request()
+        request = GenerationRequest(
+            prompt=prompt, max_tokens=max_tokens, temperature=temperature, stop=stop
+        )
+        if counter < len(self.prompts):
+            self.prompts[counter] = collected
+            self.requests[counter] = request
+        else:
+            self.prompts.append(collected)
+            self.requests.append(request)
+            self.generated.append(None)
 
         return placeholder
 
-    def set_generated(self, placeholder: str, content: str) -> None:
-        """Store generated content for a placeholder.
+    def finish_collection(self) -> None:
+        """Drop pre-sized prompt slots that no gen() call filled."""
+        del self.prompts[self.counter :]
+        del self.requests[self.counter :]
+        del self.generated[self.counter :]
+
+    def set_generated(self, idx: int, content: str) -> None:
+        """Store generated content for a prompt.
 
         Args:
-            placeholder: The placeholder string.
+            idx: The prompt index (``CollectedPrompt.index``).
             content: The generated content.
         """
-        self.generated[placeholder] = content
+        self.generated[idx] = content
 
-    def get_generated(self, placeholder: str) -> str:
-        """Get generated content for a placeholder.
+    def get_generated(self, idx: int) -> str:
+        """Get generated content for a prompt.
 
         Args:
-            placeholder: The placeholder string.
+            idx: The prompt index (``CollectedPrompt.index``).
 
         Returns:
             The generated content.
 
         Raises:
-            KeyError: If placeholder not found.
+            KeyError: If no content has been generated for the prompt.
+        """
+        content = self.generated[idx] if idx < len(self.generated) else None
+        if content is None:
+            raise KeyError(idx)
+        return content
+
+    def substitute_all(
+        self, text: str, contents: Sequence[str | None] | None = None
+    ) -> str:
+        """Replace every placeholder in text in a single pass.
+
+        Args:
+            text: Text containing placeholders.
+            contents: Replacements indexed by prompt index. Defaults to the
+                generated content.
+
+        Returns:
+            The text with all known placeholders replaced. Placeholders
+            without content are left as-is.
         """
-        return self.generated[placeholder]
+        if _PLACEHOLDER_PREFIX not in text:
+            return text
+        values = self.generated if contents is None else contents
+        size = len(values)
+
+        # split() alternates literal text with captured indices; replacing
+        # the odd slots and joining once avoids a callback per match
+        parts = _PLACEHOLDER_RE.split(text)
+        for i in range(1, len(parts), 2):
+            idx = int(parts[i])
+            value = values[idx] if idx < size else None
+            if value is None:
+                value = f"{_PLACEHOLDER_PREFIX}{parts[i]}{_PLACEHOLDER_SUFFIX}"
+            parts[i] = value
+        return "".join(parts)
+
+    def reset(self) -> None:
+        """Clear all per-render state so the context can be reused."""
+        self.counter = 0
+        self.prompts.clear()
+        self.requests.clear()
+        self.generated.clear()
+        self.variables = {}
 
 
 def get_current_context() -> RenderContext:
@@ -136,3 +280,38 @@ def set_current_context(ctx: RenderContext | None) -> None:
         ctx: The context to set, or None to clear.
     """
     _render_context.set(ctx)
+
+
+def acquire_context(
+    variables: dict[str, Any], expected_prompts: int = 0
+) -> RenderContext:
+    """Get a clean render context, reusing a pooled one when available.
+
+    Args:
+        variables: Template variables for the render.
+        expected_prompts: Number of gen() calls the template is expected to
+            make, used to pre-size prompt storage.
+
+    Returns:
+        A RenderContext holding no prompts or generated content.
+    """
+    try:
+        ctx = _context_pool.pop()
+    except IndexError:
+        return RenderContext(variables=variables, expected_prompts=expected_prompts)
+    ctx.variables = variables
+    ctx.reserve(expected_prompts)
+    return ctx
+
+
+def release_context(ctx: RenderContext) -> None:
+    """Reset a render context and return it to the pool.
+
+    The context must not be used by the caller afterwards.
+
+    Args:
+        ctx: The context to release.
+    """
+    if len(_context_pool) < _CONTEXT_POOL_SIZE:
+        ctx.reset()
+        _context_pool.append(ctx)
@@ -3,13 +3,39 @@
 from __future__ import annotations
 
 import html
-import json as json_module
 import re
 from collections.abc import Callable
+from json.encoder import encode_basestring
 from typing import Any
 
 from .exceptions import FilterError
 
+# orjson is an optional, faster JSON encoder (pip install genji[fast])
+_fast_json_dumps: Callable[[Any], bytes] | None
+try:
+    import orjson
+
+    _fast_json_dumps = orjson.dumps
+except ImportError:
+    _fast_json_dumps = None
+
+# Plain scalars YAML would misread: leading whitespace, dash or digit,
+# trailing whitespace, or any newline, colon or comment marker
+_YAML_NEEDS_QUOTE_RE = re.compile(r"^[ \t\-0-9]|[ \t]\Z|[\n:#]")
+_YAML_RESERVED = frozenset({"true", "false", "null", "yes", "no", "on", "off"})
+_YAML_RESERVED_MAX_LEN = max(map(len, _YAML_RESERVED))
+
+
+class RawJSON(str):
+    """Text that is already encoded JSON.
+
+    Backends with structured output can return ``RawJSON`` as the response
+    text; the ``json`` filter then inserts it verbatim instead of encoding
+    it as a string. The text is trusted as-is and is not validated.
+    """
+
+    __slots__ = ()
+
 
 def json_filter(value: Any) -> str:
     """Escape value for JSON string (includes surrounding quotes).
@@ -21,7 +47,8 @@ def json_filter(value: Any) -> str:
         value: The value to escape.
 
     Returns:
-        A JSON-escaped string with surrounding quotes.
+        A JSON-escaped string with surrounding quotes, or the value itself
+        if it is a ``RawJSON``.
 
     Example:
         >>> json_filter("Hello, World!")
@@ -29,8 +56,17 @@ def json_filter(value: Any) -> str:
         >>> json_filter('Line 1\\nLine 2')
         '"Line 1\\nLine 2"'
     """
+    if isinstance(value, RawJSON):
+        return str(value)
     try:
-        return json_module.dumps(str(value), ensure_ascii=False)
+        text = str(value)
+        if _fast_json_dumps is not None:
+            try:
+                return _fast_json_dumps(text).decode("utf-8")
+            except TypeError:
+                pass  # orjson rejects lone surrogates; the stdlib escapes them
+        # The C string encoder json.dumps uses, without the dispatch overhead
+        return encode_basestring(text)
     except (TypeError, ValueError) as e:
         raise FilterError(f"Failed to JSON-encode value: {e}") from e
 
@@ -44,6 +80,8 @@ def html_filter(value: Any) -> str:
     Returns:
         HTML-escaped string.
     """
+    # html.escape chains C-level str.replace calls, which beats a
+    # str.translate table with multi-character replacements
     return html.escape(str(value), quote=True)
 
 
@@ -80,21 +118,13 @@ def yaml_filter(value: Any) -> str:
     """
     s = str(value)
 
-    # Check if we need quoting
-    needs_quoting = any(
-        [
-            s.startswith((" ", "\t")),
-            s.endswith((" ", "\t")),
-            "\n" in s,
-            ":" in s,
-            "#" in s,
-            "-" in s and s.startswith("-"),
-            s.lower() in ("true", "false", "null", "yes", "no", "on", "off"),
-            re.match(r"^[0-9]", s) is not None,
-        ]
+    needs_quoting = (
+        not s
+        or _YAML_NEEDS_QUOTE_RE.search(s) is not None
+        or (len(s) <= _YAML_RESERVED_MAX_LEN and s.lower() in _YAML_RESERVED)
     )
 
-    if needs_quoting or not s:
+    if needs_quoting:
         # Use double quotes and escape necessary characters
         s = s.replace("\\", "\\\\")
         s = s.replace('"', '\\"')
@@ -172,16 +202,17 @@ def truncate_filter(value: Any, length: int = 255, suffix: str = "...") -> str:
         FilterError: If length is less than suffix length.
     """
     s = str(value)
+    suffix_length = len(suffix)
 
-    if length < len(suffix):
+    if length < suffix_length:
         raise FilterError(
-            f"Truncate length ({length}) must be >= suffix length ({len(suffix)})"
+            f"Truncate length ({length}) must be >= suffix length ({suffix_length})"
         )
 
     if len(s) <= length:
         return s
 
-    return s[: length - len(suffix)] + suffix
+    return s[: length - suffix_length] + suffix
 
 
 # Registry of all filters
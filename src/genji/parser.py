@@ -7,9 +7,12 @@ from typing import Any
 import jinja2
 from jinja2.ext import Extension
 
-from .context import get_current_context
+from .context import RenderContext, get_current_context
 from .exceptions import TemplateParseError
 
+# Render variable carrying the active RenderContext into gen()
+CONTEXT_VARIABLE = "__genji_ctx"
+
 
 class GenjiExtension(Extension):
     """Jinja2 extension that adds the gen() function for LLM generation."""
@@ -27,13 +30,14 @@ class GenjiExtension(Extension):
         # Add gen() as a global function
         environment.globals["gen"] = self._gen_function
 
+    @jinja2.pass_context
     def _gen_function(
         self,
+        jinja_ctx: jinja2.runtime.Context,
         prompt: str,
         max_tokens: int | None = None,
         temperature: float | None = None,
         stop: list[str] | None = None,
-        __source_id: int | None = None,
         **kwargs: Any,
     ) -> str:
         """The gen() function that collects prompts during rendering.
@@ -43,19 +47,24 @@ class GenjiExtension(Extension):
         generated content later.
 
         Args:
+            jinja_ctx: The Jinja2 context of the calling template.
             prompt: The prompt text (may contain format placeholders like {variable}).
             max_tokens: Optional max tokens override.
             temperature: Optional temperature override.
             stop: Optional stop sequences.
-            __source_id: Internal ID identifying the template position
-                (injected by template parser).
-            **kwargs: Additional arguments (ignored, for compatibility).
+            **kwargs: Additional arguments. ``__source_id`` identifies the
+                template position (injected by the template parser); anything
+                else is ignored, for compatibility.
 
         Returns:
             A placeholder string that will be replaced with generated content.
         """
+        # Templates receive the render context as a variable; fall back to
+        # the current context for environments rendered without it
+        ctx: RenderContext | None = jinja_ctx.get(CONTEXT_VARIABLE)
         try:
-            ctx = get_current_context()
+            if ctx is None:
+                ctx = get_current_context()
         except RuntimeError as e:
             raise TemplateParseError(
                 "gen() called outside of render context. "
@@ -63,18 +72,22 @@ class GenjiExtension(Extension):
             ) from e
 
         # Interpolate variables in the prompt using the context variables
-        try:
-            interpolated_prompt = prompt.format(**ctx.variables)
-        except (KeyError, IndexError, ValueError):
-            # If interpolation fails, use the prompt as-is
-            interpolated_prompt = prompt
+        # Prompts without braces format to themselves, so skip the formatter
+        interpolated_prompt = prompt
+        if "{" in prompt or "}" in prompt:
+            try:
+                interpolated_prompt = prompt.format_map(ctx.variables)
+            except (KeyError, IndexError, ValueError):
+                # If interpolation fails, use the prompt as-is
+                pass
 
         placeholder = ctx.collect_prompt(
             prompt=interpolated_prompt,
             max_tokens=max_tokens,
             temperature=temperature,
             stop=stop,
-            source_id=__source_id,
+            # Read from kwargs: a __source_id parameter would be name-mangled
+            source_id=kwargs.get("__source_id"),
         )
 
         return placeholder
@@ -2,19 +2,90 @@
 
 from __future__ import annotations
 
-import asyncio
+import functools
+import hashlib
 import json
+import os
 import re
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
 import jinja2
 
 from .backends.base import GenjiBackend
-from .context import RenderContext, set_current_context
-from .exceptions import TemplateRenderError
+from .context import (
+    RenderContext,
+    acquire_context,
+    release_context,
+    set_current_context,
+)
+from .exceptions import TemplateParseError, TemplateRenderError
 from .filters import FILTERS
-from .parser import create_environment
+from .parser import CONTEXT_VARIABLE, create_environment
+
+# orjson is an optional, faster JSON parser (pip install genji[fast])
+_fast_json_loads: Callable[[str], Any] | None
+try:
+    import orjson
+
+    _fast_json_loads = orjson.loads
+except ImportError:
+    _fast_json_loads = None
+
+# orjson turns integers outside the 64-bit range into floats instead of
+# rejecting them; any run of 19+ digits could be one, so such output is
+# left to the standard library
+_LONG_DIGITS_RE = re.compile(r"\d{19}")
+
+# arender only runs the Jinja2 pass for template sources, and interpolation
+# for first-pass output, at least this many characters long in a worker
+# thread; for smaller ones the thread hop costs more than the event loop
+# time it saves
+_OFFLOAD_THRESHOLD = 32_768
+
+# Pattern to match {{ gen(...) with optional filters }}
+# We need to match parentheses carefully to handle nested parens in gen()
+_GEN_CALL_RE = re.compile(
+    r"\{\{\s*gen\(([^)]+(?:\([^)]*\)[^)]*)*)\)\s*(\|[^}]+)?\s*\}\}"
+)
+
+# Default filter implied by the extension before ".genji" in a file name
+_FORMAT_FILTERS = {
+    "json": "json",
+    "html": "html",
+    "xml": "xml",
+    "yaml": "yaml",
+    "yml": "yaml",
+}
+
+# Filter functions for one gen() call, paired with their names for errors
+_ResolvedChain = tuple[tuple[str, Callable[[Any], str]], ...]
+
+
+def _parse_filter_chain(filters_part: str | None) -> list[str]:
+    """Extract filter names from a ``| filter1 | filter2`` suffix.
+
+    Args:
+        filters_part: The filter suffix matched after gen(), if any.
+
+    Returns:
+        List of filter names, with any arguments like ``truncate(10)`` removed.
+
+    Raises:
+        TemplateParseError: If a filter name is not a registered filter.
+    """
+    if not filters_part:
+        return []
+    cleaned_filters = []
+    for f in filters_part.split("|"):
+        # Extract just the filter name (before any parentheses)
+        filter_name = f.split("(")[0].strip()
+        if filter_name:
+            if filter_name not in FILTERS:
+                raise TemplateParseError(f"Unknown filter: {filter_name}")
+            cleaned_filters.append(filter_name)
+    return cleaned_filters
 
 
 class Template:
@@ -28,7 +99,11 @@ class Template:
     """
 
     def __init__(
-        self, source: str, backend: GenjiBackend, default_filter: str | None = None
+        self,
+        source: str,
+        backend: GenjiBackend,
+        default_filter: str | None = None,
+        bytecode_cache: jinja2.BytecodeCache | None = None,
     ) -> None:
         """Initialize a template.
 
@@ -39,17 +114,28 @@ class Template:
                 (e.g., "json", "html"). Can be overridden per-prompt by
                 explicitly using | filter in template. Use "raw" in template
                 to skip the default filter for a specific gen().
+            bytecode_cache: Jinja2 bytecode cache to store compiled template
+                code in, e.g. a ``jinja2.FileSystemBytecodeCache`` shared
+                across processes. Takes precedence over
+                ``GENJI_BYTECODE_CACHE_DIR``.
         """
         self._source = source
         self._backend = backend
         self._default_filter = default_filter
-        self._filter_chains, modified_source = self._extract_and_inject_filters(source)
-        self._env = self._create_environment()
-        self._template = self._env.from_string(modified_source)
+        self._filter_chains, self._template, self._env = _compile_template(
+            source, bytecode_cache
+        )
+        self._resolved_chains = _resolve_template_filters(source, default_filter)
+        # With no filters anywhere, interpolation is a plain substitution
+        self._has_filters = any(self._resolved_chains.values())
 
     @classmethod
     def from_file(
-        cls, path: str | Path, backend: GenjiBackend, default_filter: str | None = None
+        cls,
+        path: str | Path,
+        backend: GenjiBackend,
+        default_filter: str | None = None,
+        bytecode_cache: jinja2.BytecodeCache | None = None,
     ) -> Template:
         """Load a template from a file.
 
@@ -59,6 +145,7 @@ class Template:
             default_filter: Default filter to apply to all gen() calls.
                 Auto-detected from file extension
                 (.json.genji -> "json", .html.genji -> "html").
+            bytecode_cache: Jinja2 bytecode cache for the compiled template.
 
         Returns:
             A Template instance.
@@ -68,23 +155,17 @@ class Template:
             TemplateRenderError: If the file can't be read.
         """
         path = Path(path)
-
-        if not path.exists():
-            raise FileNotFoundError(f"Template file not found: {path}")
-
-        try:
-            source = path.read_text(encoding="utf-8")
-        except Exception as e:
-            raise TemplateRenderError(
-                f"Failed to read template file {path}: {e}"
-            ) from e
-
+        source = _load_source(path)
         default_filter = cls._detect_filter(path, default_filter)
-        return cls(source, backend, default_filter)
+        return cls(source, backend, default_filter, bytecode_cache)
 
     @classmethod
     async def afrom_file(
-        cls, path: str | Path, backend: GenjiBackend, default_filter: str | None = None
+        cls,
+        path: str | Path,
+        backend: GenjiBackend,
+        default_filter: str | None = None,
+        bytecode_cache: jinja2.BytecodeCache | None = None,
     ) -> Template:
         """Load a template from a file asynchronously.
 
@@ -94,6 +175,7 @@ class Template:
             default_filter: Default filter to apply to all gen() calls.
                 Auto-detected from file extension
                 (.json.genji -> "json", .html.genji -> "html").
+            bytecode_cache: Jinja2 bytecode cache for the compiled template.
 
         Returns:
             A Template instance.
@@ -102,20 +184,27 @@ class Template:
             FileNotFoundError: If the file doesn't exist.
             TemplateRenderError: If the file can't be read.
         """
-        path = Path(path)
+        import asyncio  # Deferred: ``import genji`` shouldn't load asyncio
 
-        if not path.exists():
-            raise FileNotFoundError(f"Template file not found: {path}")
+        path = Path(path)
+        # The stat is blocking too, so all of it runs off the event loop
+        source = await asyncio.to_thread(_load_source, path)
+        default_filter = cls._detect_filter(path, default_filter)
+        return cls(source, backend, default_filter, bytecode_cache)
 
-        try:
-            source = await asyncio.to_thread(path.read_text, "utf-8")
-        except Exception as e:
-            raise TemplateRenderError(
-                f"Failed to read template file {path}: {e}"
-            ) from e
+    @staticmethod
+    def clear_cache() -> None:
+        """Clear the process-wide caches behind template construction.
 
-        default_filter = cls._detect_filter(path, default_filter)
-        return cls(source, backend, default_filter)
+        Templates are compiled once per source string, and template files
+        are read once per modification time. Call this to release that
+        memory or to force recompilation, e.g. after changing filters.
+        """
+        _shared_environment.cache_clear()
+        _extract_filters.cache_clear()
+        _compile_template.cache_clear()
+        _resolve_template_filters.cache_clear()
+        _read_source_cached.cache_clear()
 
     @staticmethod
     def _detect_filter(path: Path, default_filter: str | None) -> str | None:
@@ -132,19 +221,14 @@ class Template:
             return default_filter
 
         filename = path.name.lower()
-        if ".json.genji" in filename:
-            return "json"
-        if ".html.genji" in filename:
-            return "html"
-        if ".xml.genji" in filename:
-            return "xml"
-        if ".yaml.genji" in filename or ".yml.genji" in filename:
-            return "yaml"
-        return None
-
-    def _extract_and_inject_filters(
-        self, source: str
-    ) -> tuple[dict[int, list[str]], str]:
+        if not filename.endswith(".genji"):
+            return None
+        # The format extension just before .genji, e.g. "json"
+        _, dot, extension = filename[: -len(".genji")].rpartition(".")
+        return _FORMAT_FILTERS.get(extension) if dot else None
+
+    @staticmethod
+    def _extract_and_inject_filters(source: str) -> tuple[dict[int, list[str]], str]:
         """Extract filter chains and inject source IDs into gen() calls.
 
         This parses the template to find patterns like:
@@ -159,49 +243,60 @@ class Template:
         Returns:
             Tuple of (filter chains dict, modified source with injected IDs).
         """
+        # Plain Jinja2 templates have nothing to rewrite
+        if "gen(" not in source:
+            return {}, source
+
         filter_chains: dict[int, list[str]] = {}
-        modified_source = source
-        gen_index = 0
-        offset = 0  # Track offset for string replacements
-
-        # Pattern to match {{ gen(...) with optional filters }}
-        # We need to match parentheses carefully to handle nested parens in gen()
-        pattern = r"\{\{\s*gen\(([^)]+(?:\([^)]*\)[^)]*)*)\)\s*(\|[^}]+)?\s*\}\}"
-
-        for match in re.finditer(pattern, source):
-            # Extract filter chain
-            filters_part = match.group(2)
-            if filters_part:
-                # Extract filter names from | filter1 | filter2 format
-                filter_names = [f.strip() for f in filters_part.split("|") if f.strip()]
-                # Handle filters with arguments like truncate(10)
-                cleaned_filters = []
-                for f in filter_names:
-                    # Extract just the filter name (before any parentheses)
-                    filter_name = f.split("(")[0].strip()
-                    if filter_name:
-                        cleaned_filters.append(filter_name)
-                filter_chains[gen_index] = cleaned_filters
-            else:
-                filter_chains[gen_index] = []
 
+        def inject(match: re.Match[str]) -> str:
+            gen_index = len(filter_chains)
+            filter_chains[gen_index] = _parse_filter_chain(match.group(2))
             # Inject source ID into the gen() call
-            gen_args = match.group(1)
-            replacement = f"{{{{ gen({gen_args}, __source_id={gen_index}) }}}}"
+            return f"{{{{ gen({match.group(1)}, __source_id={gen_index}) }}}}"
+
+        # A single sub() pass rebuilds the source in linear time instead of
+        # re-splicing the whole string for every gen() call.
+        return filter_chains, _GEN_CALL_RE.sub(inject, source)
 
-            # Replace in modified source (accounting for previous replacements)
-            start = match.start() + offset
-            end = match.end() + offset
-            modified_source = (
-                modified_source[:start] + replacement + modified_source[end:]
-            )
-            offset += len(replacement) - (match.end() - match.start())
+    @staticmethod
+    def _resolve_filter_chains(
+        filter_chains: dict[int, list[str]], default_filter: str | None
+    ) -> dict[int | None, _ResolvedChain]:
+        """Resolve every filter chain to its filter functions up front.
 
-            gen_index += 1
+        The default filter applies to gen() calls without filters, and a
+        lone ``raw`` disables it. gen() calls the parser did not tag with a
+        source ID are stored under ``None`` and get the default filter.
 
-        return filter_chains, modified_source
+        Args:
+            filter_chains: Filter names per source ID, as extracted.
+            default_filter: The template's default filter, if any.
 
-    def _create_environment(self) -> jinja2.Environment:
+        Returns:
+            Mapping from source ID to a tuple of (name, filter function) pairs.
+
+        Raises:
+            TemplateParseError: If the default filter is not a registered filter.
+        """
+        default_chain = [default_filter] if default_filter else []
+        if default_filter and default_filter not in FILTERS:
+            raise TemplateParseError(f"Unknown filter: {default_filter}")
+        chain_names: dict[int | None, list[str]] = {None: default_chain}
+        for source_id, filter_chain in filter_chains.items():
+            if not filter_chain:
+                filter_chain = default_chain
+            elif filter_chain == ["raw"]:
+                filter_chain = []
+            chain_names[source_id] = filter_chain
+
+        return {
+            source_id: tuple((name, FILTERS[name]) for name in filter_chain)
+            for source_id, filter_chain in chain_names.items()
+        }
+
+    @staticmethod
+    def _create_environment() -> jinja2.Environment:
         """Create a Jinja2 environment with custom filters.
 
         Returns:
@@ -226,31 +321,36 @@ class Template:
         Returns:
             The final rendered string with all placeholders replaced.
         """
-        result = first_pass
-        for prompt in render_ctx.prompts:
-            generated = render_ctx.get_generated(prompt.placeholder)
+        if not self._has_filters:
+            return render_ctx.substitute_all(first_pass)
 
-            filter_chain = self._filter_chains.get(prompt.source_id or 0, [])
-
-            if not filter_chain and self._default_filter:
-                filter_chain = [self._default_filter]
-            elif filter_chain == ["raw"]:
-                filter_chain = []
-
-            filtered_content = generated
-            for filter_name in filter_chain:
-                filter_fn = FILTERS.get(filter_name)
-                if filter_fn:
+        filtered: list[str] = []
+        # Identical content through the same chain is filtered only once. The
+        # type is part of the key because RawJSON compares equal to its str.
+        memo: dict[tuple[_ResolvedChain, type[str], str], str] = {}
+        for prompt in render_ctx.prompts:
+            generated = render_ctx.get_generated(prompt.index)
+            chain = self._resolved_chains[prompt.source_id]
+            if not chain:
+                filtered.append(generated)
+                continue
+
+            key = (chain, type(generated), generated)
+            filtered_content = memo.get(key)
+            if filtered_content is None:
+                filtered_content = generated
+                for filter_name, filter_fn in chain:
                     try:
                         filtered_content = filter_fn(filtered_content)
                     except Exception as e:
                         raise TemplateRenderError(
                             f"Filter '{filter_name}' failed: {e}"
                         ) from e
+                memo[key] = filtered_content
 
-            result = result.replace(prompt.placeholder, filtered_content)
+            filtered.append(filtered_content)
 
-        return result
+        return render_ctx.substitute_all(first_pass, filtered)
 
     # ------------------------------------------------------------------
     # Synchronous API
@@ -273,22 +373,25 @@ class Template:
         Raises:
             TemplateRenderError: If rendering fails.
         """
-        render_ctx = RenderContext(variables=context)
+        render_ctx = acquire_context(context, len(self._filter_chains))
 
         try:
             set_current_context(render_ctx)
 
             # Phase 1: Collection
             try:
-                first_pass = self._template.render(**context)
+                first_pass = self._template.render(
+                    context, **{CONTEXT_VARIABLE: render_ctx}
+                )
             except jinja2.TemplateError as e:
                 raise TemplateRenderError(f"Template rendering failed: {e}") from e
+            render_ctx.finish_collection()
 
             if not render_ctx.prompts:
                 return first_pass
 
             # Phase 2: Generation
-            requests = [p.to_request() for p in render_ctx.prompts]
+            requests = list(render_ctx.requests)
 
             try:
                 responses = self._backend.generate_batch(requests)
@@ -296,13 +399,14 @@ class Template:
                 raise TemplateRenderError(f"LLM backend generation failed: {e}") from e
 
             for prompt, response in zip(render_ctx.prompts, responses):
-                render_ctx.set_generated(prompt.placeholder, response.text)
+                render_ctx.set_generated(prompt.index, response.text)
 
             # Phase 3: Interpolation
             return self._interpolate(first_pass, render_ctx)
 
         finally:
             set_current_context(None)
+            release_context(render_ctx)
 
     def render_json(self, **context: Any) -> dict[str, Any]:
         """Render the template and parse as JSON.
@@ -319,7 +423,7 @@ class Template:
         result = self.render(**context)
 
         try:
-            return json.loads(result)  # type: ignore[no-any-return]
+            return _parse_json(result)  # type: ignore[no-any-return]
         except json.JSONDecodeError as e:
             raise TemplateRenderError(
                 f"Template output is not valid JSON: {e}\nOutput was:\n{result}"
@@ -332,10 +436,13 @@ class Template:
     async def arender(self, **context: Any) -> str:
         """Render the template with the given context asynchronously.
 
-        Uses the same three-phase process as ``render`` but awaits the
-        generation phase.  If the backend exposes ``agenerate_batch`` it is
-        called natively; otherwise the synchronous ``generate_batch`` is
-        offloaded to a thread via ``asyncio.to_thread``.
+        Uses the same three-phase process as ``render`` but awaits every
+        phase.  The Jinja2 render of large templates runs in a worker thread
+        via ``asyncio.to_thread`` so it doesn't block the event loop; small
+        templates render inline.  Interpolation is offloaded the same way
+        when the rendered output is large.  If the backend exposes
+        ``agenerate_batch`` it is called natively; otherwise the synchronous
+        ``generate_batch`` is offloaded to a thread as well.
 
         Args:
             **context: Template variables.
@@ -346,22 +453,37 @@ class Template:
         Raises:
             TemplateRenderError: If rendering fails.
         """
-        render_ctx = RenderContext(variables=context)
+        import asyncio  # Deferred: ``import genji`` shouldn't load asyncio
+
+        render_ctx = acquire_context(context, len(self._filter_chains))
+        finished = False
 
         try:
             set_current_context(render_ctx)
 
-            # Phase 1: Collection (sync -- Jinja2 template execution)
+            # Phase 1: Collection (large templates render in a worker thread
+            # so they don't block the event loop)
             try:
-                first_pass = self._template.render(**context)
+                if len(self._source) >= _OFFLOAD_THRESHOLD:
+                    first_pass = await asyncio.to_thread(
+                        self._template.render,
+                        context,
+                        **{CONTEXT_VARIABLE: render_ctx},
+                    )
+                else:
+                    first_pass = self._template.render(
+                        context, **{CONTEXT_VARIABLE: render_ctx}
+                    )
             except jinja2.TemplateError as e:
                 raise TemplateRenderError(f"Template rendering failed: {e}") from e
+            render_ctx.finish_collection()
 
             if not render_ctx.prompts:
+                finished = True
                 return first_pass
 
             # Phase 2: Generation (async)
-            requests = [p.to_request() for p in render_ctx.prompts]
+            requests = list(render_ctx.requests)
 
             try:
                 if hasattr(self._backend, "agenerate_batch"):
@@ -374,13 +496,25 @@ class Template:
                 raise TemplateRenderError(f"LLM backend generation failed: {e}") from e
 
             for prompt, response in zip(render_ctx.prompts, responses):
-                render_ctx.set_generated(prompt.placeholder, response.text)
+                render_ctx.set_generated(prompt.index, response.text)
 
-            # Phase 3: Interpolation
-            return self._interpolate(first_pass, render_ctx)
+            # Phase 3: Interpolation (off-loop for large output)
+            if len(first_pass) >= _OFFLOAD_THRESHOLD:
+                result = await asyncio.to_thread(
+                    self._interpolate, first_pass, render_ctx
+                )
+            else:
+                result = self._interpolate(first_pass, render_ctx)
+            finished = True
+            return result
 
         finally:
             set_current_context(None)
+            # Cancelling an awaited to_thread call leaves its worker thread
+            # running with this context, so it is only pooled after a clean
+            # finish; otherwise it is dropped
+            if finished:
+                release_context(render_ctx)
 
     async def arender_json(self, **context: Any) -> dict[str, Any]:
         """Render the template and parse as JSON asynchronously.
@@ -397,8 +531,203 @@ class Template:
         result = await self.arender(**context)
 
         try:
-            return json.loads(result)  # type: ignore[no-any-return]
+            return _parse_json(result)  # type: ignore[no-any-return]
         except json.JSONDecodeError as e:
             raise TemplateRenderError(
                 f"Template output is not valid JSON: {e}\nOutput was:\n{result}"
             ) from e
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_environment() -> jinja2.Environment:
+    """Return the environment all templates are compiled in.
+
+    Compiled templates keep no per-template state on their environment,
+    so one is created lazily and shared instead of one per source.
+
+    Returns:
+        The shared Jinja2 environment.
+    """
+    return Template._create_environment()
+
+
+@functools.lru_cache(maxsize=128)
+def _extract_filters(source: str) -> tuple[dict[int, list[str]], str]:
+    """Extract filter chains and inject source IDs, memoized.
+
+    Args:
+        source: The template source string.
+
+    Returns:
+        Tuple of (filter chains, modified source).
+    """
+    return Template._extract_and_inject_filters(source)
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_template(
+    source: str, bytecode_cache: jinja2.BytecodeCache | None = None
+) -> tuple[dict[int, list[str]], jinja2.Template, jinja2.Environment]:
+    """Extract filter chains and compile a template source, memoized.
+
+    Templates built from the same source share the result, skipping the
+    filter extraction pass and Jinja2 compilation. The returned objects
+    must not be mutated.
+
+    Args:
+        source: The template source string.
+        bytecode_cache: Bytecode cache to compile through, if any.
+
+    Returns:
+        Tuple of (filter chains, compiled template, environment).
+    """
+    filter_chains, modified_source = _extract_filters(source)
+    env = _shared_environment()
+    template = _compile_source(env, modified_source, bytecode_cache)
+    return filter_chains, template, env
+
+
+def _compile_source(
+    env: jinja2.Environment,
+    source: str,
+    bytecode_cache: jinja2.BytecodeCache | None = None,
+) -> jinja2.Template:
+    """Compile template source, reusing cached bytecode when configured.
+
+    An explicit ``bytecode_cache`` is used as-is. Otherwise, setting
+    ``GENJI_BYTECODE_CACHE_DIR`` stores the compiled bytecode of each
+    distinct source there, so later processes skip Jinja2 code
+    generation. With neither, the source is compiled directly.
+
+    Args:
+        env: The environment to compile in.
+        source: Template source with source IDs injected.
+        bytecode_cache: Bytecode cache to load from and store into.
+
+    Returns:
+        The compiled template.
+    """
+    cache_dir = None
+    if bytecode_cache is None:
+        cache_dir = os.getenv("GENJI_BYTECODE_CACHE_DIR")
+        if cache_dir:
+            bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+
+    if bytecode_cache is None:
+        code = env.compile(source)
+    else:
+        # from_string never consults a bytecode cache, so drive one directly.
+        # Buckets are named by content hash, so every source gets its own entry.
+        name = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        bucket = bytecode_cache.get_bucket(env, name, None, source)
+        if bucket.code is None:
+            bucket.code = env.compile(source)
+            try:
+                if cache_dir is not None:
+                    os.makedirs(cache_dir, exist_ok=True)
+                bytecode_cache.set_bucket(bucket)
+            except OSError:
+                pass  # The cache is best-effort; the compiled code is still used
+        code = bucket.code
+
+    # Jinja2 keeps template globals as a ChainMap over the environment's and
+    # copies it key by key into every render context. The shared environment
+    # is never changed after setup, so a flat dict copies several times faster.
+    globals_ = dict(env.make_globals(None))
+    return env.template_class.from_code(env, code, globals_)
+
+
+def _load_source(path: Path) -> str:
+    """Load a template file's source for ``from_file``/``afrom_file``.
+
+    Args:
+        path: Path to the template file.
+
+    Returns:
+        The template source.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist.
+        TemplateRenderError: If the file can't be read.
+    """
+    try:
+        return _read_source(path)
+    except FileNotFoundError:
+        # Reported by the stat in _read_source, saving a separate exists()
+        raise FileNotFoundError(f"Template file not found: {path}") from None
+    except Exception as e:
+        raise TemplateRenderError(f"Failed to read template file {path}: {e}") from e
+
+
+def _read_source(path: Path) -> str:
+    """Read a template file, reusing the cached text while it is unchanged.
+
+    Args:
+        path: Path to the template file.
+
+    Returns:
+        The file contents decoded as UTF-8.
+    """
+    stat = path.stat()
+    return _read_source_cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=64)
+def _read_source_cached(path: str, mtime_ns: int, size: int) -> str:
+    """Read a template file, memoized on its path, mtime and size.
+
+    Args:
+        path: Absolute path to the template file.
+        mtime_ns: File modification time, part of the cache key.
+        size: File size in bytes, part of the cache key.
+
+    Returns:
+        The file contents decoded as UTF-8.
+    """
+    return Path(path).read_text(encoding="utf-8")
+
+
+@functools.lru_cache(maxsize=128)
+def _resolve_template_filters(
+    source: str, default_filter: str | None
+) -> dict[int | None, _ResolvedChain]:
+    """Resolve a template source's filter chains, memoized.
+
+    Templates sharing a source and default filter share the resolved
+    chains. The returned mapping must not be mutated.
+
+    Args:
+        source: The template source string.
+        default_filter: The template's default filter, if any.
+
+    Returns:
+        Mapping from source ID to a tuple of (name, filter function) pairs.
+    """
+    filter_chains = _extract_filters(source)[0]
+    return Template._resolve_filter_chains(filter_chains, default_filter)
+
+
+def _parse_json(text: str) -> Any:
+    """Parse rendered output as JSON, using orjson when it is installed.
+
+    Output orjson rejects is re-parsed with the standard library, and output
+    with 19 or more consecutive digits skips orjson, which would turn
+    integers beyond 64 bits into floats. Values such as ``NaN`` or very
+    large integers and the error messages are the same with or without
+    orjson.
+
+    Args:
+        text: The rendered template output.
+
+    Returns:
+        The parsed JSON value.
+
+    Raises:
+        json.JSONDecodeError: If the text is not valid JSON.
+    """
+    if _fast_json_loads is not None and not _LONG_DIGITS_RE.search(text):
+        try:
+            return _fast_json_loads(text)
+        except ValueError:
+            pass
+    return json.loads(text)
@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
-import tempfile
+import threading
 from pathlib import Path
 
 import pytest
 from genji import Template
 from genji.backends.base import GenerationRequest
 from genji.backends.mock import MockBackend
+from genji.context import RenderContext, get_current_context, set_current_context
 from genji.exceptions import TemplateRenderError
 
 # ---------------------------------------------------------------------------
@@ -71,6 +73,26 @@ class TestAsyncTemplateBasics:
         result = await template.arender(name="World")
         assert result == "Hello World"
 
+    async def test_concurrent_arenders_keep_separate_contexts(
+        self, mock_backend: MockBackend
+    ) -> None:
+        template = Template(
+            '{{ name }}: {{ gen("greeting for {name}") }}', backend=mock_backend
+        )
+        names = [f"user{i}" for i in range(20)]
+        results = await asyncio.gather(*(template.arender(name=n) for n in names))
+        assert results == [f"{n}: Generated: greeting for {n}" for n in names]
+
+    async def test_current_context_is_per_task(self) -> None:
+        async def use_context(name: str) -> str:
+            ctx = RenderContext(variables={"name": name})
+            set_current_context(ctx)
+            await asyncio.sleep(0)  # Let the other task set its context
+            return str(get_current_context().variables["name"])
+
+        results = await asyncio.gather(use_context("a"), use_context("b"))
+        assert results == ["a", "b"]
+
 
 # ---------------------------------------------------------------------------
 # Async Template with filters
@@ -97,6 +119,17 @@ class TestAsyncTemplateWithFilters:
         assert "&lt;script&gt;" in result
         assert "<script>" not in result
 
+    async def test_large_output_matches_sync_render(self) -> None:
+        """Test output large enough to interpolate off-loop matches render()."""
+        backend = MockBackend(default_response="<b>")
+        template = Template(
+            '{% for i in range(5000) %}{{ gen("item {i}") | html }}-{{ i }};{% endfor %}',
+            backend=backend,
+        )
+        result = await template.arender()
+        assert result == template.render()
+        assert result.startswith("&lt;b&gt;-0;&lt;b&gt;-1;")
+
 
 # ---------------------------------------------------------------------------
 # Async Template control flow
@@ -134,35 +167,23 @@ class TestAsyncTemplateControlFlow:
 class TestAsyncTemplateFromFile:
     """Tests for loading templates from files asynchronously."""
 
-    async def test_afrom_file(self, mock_backend: MockBackend) -> None:
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".genji", delete=False) as f:
-            f.write('{{ gen("test") }}')
-            f.flush()
-            temp_path = f.name
+    async def test_afrom_file(self, mock_backend: MockBackend, tmp_path: Path) -> None:
+        path = tmp_path / "test.genji"
+        path.write_text('{{ gen("test") }}', encoding="utf-8")
 
-        try:
-            template = await Template.afrom_file(temp_path, backend=mock_backend)
-            result = await template.arender()
-            assert result == "Generated: test"
-        finally:
-            Path(temp_path).unlink()
+        template = await Template.afrom_file(str(path), backend=mock_backend)
+        result = await template.arender()
+        assert result == "Generated: test"
 
-    async def test_afrom_file_auto_detects_json_filter(self) -> None:
+    async def test_afrom_file_auto_detects_json_filter(self, tmp_path: Path) -> None:
         backend = MockBackend(default_response="value")
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".json.genji", delete=False
-        ) as f:
-            f.write('{"key": {{ gen("prompt") }}}')
-            f.flush()
-            temp_path = f.name
-
-        try:
-            template = await Template.afrom_file(temp_path, backend=backend)
-            result = await template.arender()
-            data = json.loads(result)
-            assert data["key"] == "value"
-        finally:
-            Path(temp_path).unlink()
+        path = tmp_path / "test.json.genji"
+        path.write_text('{"key": {{ gen("prompt") }}}', encoding="utf-8")
+
+        template = await Template.afrom_file(str(path), backend=backend)
+        result = await template.arender()
+        data = json.loads(result)
+        assert data["key"] == "value"
 
     async def test_afrom_file_not_found(self, mock_backend: MockBackend) -> None:
         with pytest.raises(FileNotFoundError):
@@ -201,6 +222,50 @@ class TestAsyncTemplateRenderJson:
 class TestAsyncTemplateErrorHandling:
     """Tests for async error handling."""
 
+    async def test_small_template_renders_on_loop_thread(self) -> None:
+        """Test small templates call context functions on the loop thread."""
+        template = Template("{{ thread_id() }}", backend=MockBackend())
+        rendered = await template.arender(thread_id=threading.get_ident)
+        assert rendered == str(threading.get_ident())
+
+    async def test_cancelled_render_context_is_not_reused(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test a render cancelled mid-collection can't leak into the next."""
+        # Render every template in a worker thread so A can be cancelled
+        monkeypatch.setattr("genji.template._OFFLOAD_THRESHOLD", 0)
+        started = threading.Event()
+        resume_a = threading.Event()
+        a_done = threading.Event()
+
+        def wait_a() -> str:
+            started.set()
+            resume_a.wait(timeout=5)
+            return ""
+
+        def wait_b() -> str:
+            # Let A's orphaned worker thread finish collecting first
+            resume_a.set()
+            a_done.wait(timeout=5)
+            return ""
+
+        template_a = Template(
+            '{{ gen("A-prompt") }}{{ wait_a() }}{{ gen("A-late") }}{{ done() }}',
+            backend=MockBackend(),
+        )
+        task = asyncio.create_task(
+            template_a.arender(wait_a=wait_a, done=lambda: a_done.set() or "")
+        )
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        backend = MockBackend()
+        template_b = Template('{{ gen("B-prompt") }}{{ wait_b() }}', backend=backend)
+        assert await template_b.arender(wait_b=wait_b) == "[MOCK: B-prompt]"
+        assert [r.prompt for r in backend.all_requests] == ["B-prompt"]
+
     async def test_backend_error_propagation(self) -> None:
         class ErrorBackend:
             def generate(self, request):  # type: ignore[no-untyped-def]
@@ -2,8 +2,20 @@
 
 from __future__ import annotations
 
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
+from typing import Any
+
+import litellm
+import pytest
+from genji import Template
 from genji.backends.base import GenerationRequest
+from genji.backends.litellm import LLMBackend
 from genji.backends.mock import MockBackend
+from genji.exceptions import BackendError
 
 
 class TestMockBackend:
@@ -35,3 +47,497 @@ class TestMockBackend:
         assert len(responses) == 2
         assert responses[0].text == "Response: first"
         assert responses[1].text == "Response: second"
+
+    def test_cached_response_fn(self) -> None:
+        """Test cache=True calls response_fn once per distinct prompt."""
+        prompts: list[str] = []
+
+        def respond(prompt: str) -> str:
+            prompts.append(prompt)
+            return prompt.upper()
+
+        backend = MockBackend(response_fn=respond, cache=True)
+        requests = [GenerationRequest(prompt=p) for p in ("a", "b", "a")]
+        responses = backend.generate_batch(requests)
+
+        assert [r.text for r in responses] == ["A", "B", "A"]
+        assert prompts == ["a", "b"]
+        assert backend.call_count == 3
+
+
+class TestGenerationRequest:
+    """Tests for GenerationRequest."""
+
+    def test_requests_are_hashable(self) -> None:
+        """Test stop lists are frozen to tuples so requests can be dict keys."""
+        request = GenerationRequest(prompt="test", stop=["\n"])
+        assert request.stop == ("\n",)
+        assert {request: 1}[GenerationRequest(prompt="test", stop=("\n",))] == 1
+
+    def test_string_stop_kept_whole(self) -> None:
+        """Test a single stop string is not split into characters."""
+        request = GenerationRequest(prompt="test", stop="END")
+        assert request.stop == ("END",)
+        kwargs = LLMBackend(model="test-model")._build_litellm_kwargs(request)
+        assert kwargs["stop"] == ["END"]
+
+
+def _fake_completion_response(text: str) -> SimpleNamespace:
+    """Build an object shaped like a litellm completion response."""
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(message=SimpleNamespace(content=text), finish_reason="stop")
+        ],
+        usage=None,
+    )
+
+
+class TestLLMBackend:
+    """Tests for LLMBackend with litellm calls stubbed out."""
+
+    def test_packed_generation(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test compatible requests are answered by a single packed call."""
+        calls: list[dict[str, Any]] = []
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            calls.append(kwargs)
+            return _fake_completion_response("<<1>>\nfirst\n<</1>>\n<<2>>second<</2>>")
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        backend = LLMBackend(model="test-model", pack_prompts=True)
+        responses = backend.generate_batch(
+            [GenerationRequest(prompt="a"), GenerationRequest(prompt="b")]
+        )
+
+        assert [r.text for r in responses] == ["first", "second"]
+        assert len(calls) == 1
+        assert "1. a\n2. b" in calls[0]["messages"][-1]["content"]
+
+    def test_packed_generation_falls_back(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test unparseable packed output falls back to one call per request."""
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            prompt = kwargs["messages"][-1]["content"]
+            if "Items:" in prompt:
+                return _fake_completion_response("<<1>>only one<</1>>")
+            return _fake_completion_response(f"single {prompt}")
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        backend = LLMBackend(model="test-model", pack_prompts=True)
+        responses = backend.generate_batch(
+            [GenerationRequest(prompt="a"), GenerationRequest(prompt="b")]
+        )
+
+        assert [r.text for r in responses] == ["single a", "single b"]
+
+    def test_packed_groups_run_concurrently(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test generate_packed sends separate groups in parallel."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            barrier.wait()
+            return _fake_completion_response(kwargs["messages"][-1]["content"])
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        backend = LLMBackend(model="test-model", pack_prompts=True)
+        responses = backend.generate_packed(
+            [
+                GenerationRequest(prompt="a", max_tokens=5),
+                GenerationRequest(prompt="b", max_tokens=10),
+            ]
+        )
+
+        assert [r.text for r in responses] == ["a", "b"]
+
+    async def test_async_batch_respects_max_concurrency(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test agenerate_batch never exceeds max_concurrency in-flight calls."""
+        in_flight = 0
+        peak = 0
+
+        async def fake_acompletion(**kwargs: Any) -> SimpleNamespace:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return _fake_completion_response(kwargs["messages"][-1]["content"])
+
+        monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+        backend = LLMBackend(model="test-model", max_concurrency=2)
+        responses = await backend.agenerate_batch(
+            [GenerationRequest(prompt=str(i)) for i in range(5)]
+        )
+
+        assert [r.text for r in responses] == ["0", "1", "2", "3", "4"]
+        assert peak == 2
+
+    async def test_async_mixed_batch_shares_max_concurrency(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test sampled and plain calls of one async batch share the bound."""
+        in_flight = 0
+        peak = 0
+
+        async def fake_acompletion(**kwargs: Any) -> SimpleNamespace:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return _fake_completion_response(kwargs["messages"][-1]["content"])
+
+        monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+        backend = LLMBackend(model="test-model", max_concurrency=2)
+        requests = [GenerationRequest(prompt=p) for p in ("a", "a", "b", "b")]
+        requests += [GenerationRequest(prompt=str(i)) for i in range(4)]
+        await backend.agenerate_batch(requests)
+
+        assert peak == 2
+
+    def test_mixed_batch_shares_max_concurrency(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test sampled and plain calls of one threaded batch share the bound."""
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return _fake_completion_response(kwargs["messages"][-1]["content"])
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        backend = LLMBackend(model="test-model", max_concurrency=2)
+        requests = [GenerationRequest(prompt=p) for p in ("a", "a", "b", "b")]
+        requests += [GenerationRequest(prompt=str(i)) for i in range(4)]
+        backend.generate_batch(requests)
+
+        assert peak == 2
+
+    def test_batch_deduplicates_identical_requests(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test identical zero-temperature requests share one completion call."""
+        prompts: list[str] = []
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            prompts.append(kwargs["messages"][-1]["content"])
+            return _fake_completion_response(f"re: {prompts[-1]}")
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        backend = LLMBackend(model="test-model")
+        responses = backend.generate_batch(
+            [GenerationRequest(prompt=p, temperature=0) for p in ("a", "b", "a")]
+        )
+
+        assert [r.text for r in responses] == ["re: a", "re: b", "re: a"]
+        assert sorted(prompts) == ["a", "b"]
+
+    def test_default_temperature_duplicates_get_distinct_samples(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test repeated prompts at the provider default temperature are sampled."""
+        calls: list[dict[str, Any]] = []
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            calls.append(kwargs)
+            choices = [
+                SimpleNamespace(
+                    message=SimpleNamespace(content=f"r{i}"), finish_reason="stop"
+                )
+                for i in range(1, kwargs.get("n", 1) + 1)
+            ]
+            return SimpleNamespace(choices=choices, usage=None)
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        template = Template(
+            '{% for i in range(3) %}{{ gen("a random name") }},{% endfor %}',
+            backend=LLMBackend(model="test-model"),
+        )
+
+        assert template.render() == "r1,r2,r3,"
+        assert [c.get("n") for c in calls] == [3]
+        assert "temperature" not in calls[0]
+
+    def test_default_temperature_duplicates_without_n(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test sampled duplicates are sent separately when n is disabled."""
+        prompts: list[str] = []
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            prompts.append(kwargs["messages"][-1]["content"])
+            return _fake_completion_response(f"r{len(prompts)}")
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        backend = LLMBackend(model="test-model", use_n_parameter=False)
+        responses = backend.generate_batch([GenerationRequest(prompt="a")] * 3)
+
+        assert sorted(r.text for r in responses) == ["r1", "r2", "r3"]
+        assert prompts == ["a", "a", "a"]
+
+    def test_duplicates_fall_back_when_n_unsupported(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test providers rejecting n get one call per duplicate instead."""
+        calls: list[dict[str, Any]] = []
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            calls.append(kwargs)
+            if "n" in kwargs:
+                raise litellm.UnsupportedParamsError(
+                    message="anthropic does not support parameters: ['n']"
+                )
+            return _fake_completion_response(f"r{len(calls)}")
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        template = Template(
+            '{% for i in range(3) %}{{ gen("a random name") }},{% endfor %}',
+            backend=LLMBackend(model="anthropic/claude-3-5-sonnet-20241022"),
+        )
+
+        assert sorted(template.render().split(",")) == ["", "r2", "r3", "r4"]
+        assert [c.get("n") for c in calls] == [3, None, None, None]
+        calls.clear()
+        template.render()
+        assert [c.get("n") for c in calls] == [None, None, None]
+
+    async def test_async_duplicates_fall_back_when_n_unsupported(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test agenerate_batch also falls back when a provider rejects n."""
+        calls: list[dict[str, Any]] = []
+
+        async def fake_acompletion(**kwargs: Any) -> SimpleNamespace:
+            calls.append(kwargs)
+            if "n" in kwargs:
+                raise litellm.UnsupportedParamsError(
+                    message="ollama does not support parameters: ['n']"
+                )
+            return _fake_completion_response("sample")
+
+        monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+        backend = LLMBackend(model="ollama/llama3")
+        responses = await backend.agenerate_batch([GenerationRequest(prompt="a")] * 2)
+
+        assert [r.text for r in responses] == ["sample", "sample"]
+        assert [c.get("n") for c in calls] == [2, None, None]
+
+    def test_template_render_sends_repeated_prompts_once(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test a template repeating a deterministic prompt calls the LLM once."""
+        prompts: list[str] = []
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            prompts.append(kwargs["messages"][-1]["content"])
+            return _fake_completion_response("tip")
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        template = Template(
+            '{% for _ in range(3) %}{{ gen("a tip", temperature=0) }};{% endfor %}',
+            backend=LLMBackend(model="test-model"),
+        )
+
+        assert template.render() == "tip;tip;tip;"
+        assert prompts == ["a tip"]
+
+    def test_sync_batch_can_delegate_to_async(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test use_async_under_sync routes sync batches through acompletion."""
+
+        async def fake_acompletion(**kwargs: Any) -> SimpleNamespace:
+            return _fake_completion_response(kwargs["messages"][-1]["content"])
+
+        def fail_completion(**kwargs: Any) -> SimpleNamespace:
+            raise AssertionError("sync completion should not be called")
+
+        monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+        monkeypatch.setattr(litellm, "completion", fail_completion)
+        backend = LLMBackend(model="test-model", use_async_under_sync=True)
+        responses = backend.generate_batch(
+            [GenerationRequest(prompt="a"), GenerationRequest(prompt="b")]
+        )
+
+        assert [r.text for r in responses] == ["a", "b"]
+
+    def test_response_cache(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test deterministic requests are served from the LRU cache."""
+        calls: list[str] = []
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            calls.append(kwargs["messages"][-1]["content"])
+            return _fake_completion_response(f"re: {calls[-1]}")
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        backend = LLMBackend(model="test-model", cache_size=1, temperature=0)
+
+        assert backend.generate(GenerationRequest(prompt="a")).text == "re: a"
+        assert backend.generate(GenerationRequest(prompt="a")).text == "re: a"
+        assert calls == ["a"]
+
+        backend.generate(GenerationRequest(prompt="b"))
+        backend.generate(GenerationRequest(prompt="a"))
+        backend.generate(GenerationRequest(prompt="c", temperature=0.7))
+        backend.generate(GenerationRequest(prompt="c", temperature=0.7))
+        assert calls == ["a", "b", "a", "c", "c"]
+
+    def test_response_cache_ttl(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test cached responses expire after cache_ttl seconds."""
+        calls: list[str] = []
+        now = [100.0]
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            calls.append(kwargs["messages"][-1]["content"])
+            return _fake_completion_response(f"re: {calls[-1]}")
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        backend = LLMBackend(
+            model="test-model", cache_size=4, cache_ttl=10, temperature=0
+        )
+
+        backend.generate(GenerationRequest(prompt="a"))
+        now[0] += 9
+        backend.generate(GenerationRequest(prompt="a"))
+        assert calls == ["a"]
+
+        now[0] += 1
+        backend.generate(GenerationRequest(prompt="a"))
+        assert calls == ["a", "a"]
+
+    def test_duplicates_sampled_with_n(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test duplicated requests above temperature 0 share one n-sample call."""
+        calls: list[dict[str, Any]] = []
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            calls.append(kwargs)
+            choices = [
+                SimpleNamespace(
+                    message=SimpleNamespace(content=f"name {i}"), finish_reason="stop"
+                )
+                for i in range(kwargs.get("n", 1))
+            ]
+            return SimpleNamespace(choices=choices, usage=None)
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        backend = LLMBackend(model="test-model")
+        responses = backend.generate_batch(
+            [GenerationRequest(prompt="a name", temperature=0.8)] * 3
+            + [GenerationRequest(prompt="other")]
+        )
+
+        assert [r.text for r in responses] == ["name 0", "name 1", "name 2", "name 0"]
+        assert sorted(c.get("n", 1) for c in calls) == [1, 3]
+
+    def test_router_dispatch(self) -> None:
+        """Test completions go through the router when one is configured."""
+
+        class FakeRouter:
+            def __init__(self) -> None:
+                self.calls: list[dict[str, Any]] = []
+
+            def completion(self, **kwargs: Any) -> SimpleNamespace:
+                self.calls.append(kwargs)
+                return _fake_completion_response("routed")
+
+        router = FakeRouter()
+        backend = LLMBackend(
+            model="group",
+            router=router,  # type: ignore[arg-type]
+            enable_prompt_caching=True,
+        )
+
+        assert backend.generate(GenerationRequest(prompt="a")).text == "routed"
+        assert router.calls[0]["model"] == "group"
+        assert router.calls[0]["caching"] is True
+
+    async def test_streaming_generation(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test streamed chunks are forwarded and accumulated into a response."""
+
+        async def fake_stream() -> AsyncIterator[SimpleNamespace]:
+            for content, finish_reason in (("Hel", None), ("lo", None), (None, "stop")):
+                yield SimpleNamespace(
+                    choices=[
+                        SimpleNamespace(
+                            delta=SimpleNamespace(content=content),
+                            finish_reason=finish_reason,
+                        )
+                    ]
+                )
+
+        async def fake_acompletion(**kwargs: Any) -> AsyncIterator[SimpleNamespace]:
+            assert kwargs["stream"] is True
+            return fake_stream()
+
+        monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+        backend = LLMBackend(model="test-model")
+        chunks: list[str] = []
+        response = await backend.agenerate_streaming(
+            GenerationRequest(prompt="hi"), on_chunk=chunks.append
+        )
+
+        assert chunks == ["Hel", "lo"]
+        assert response.text == "Hello"
+        assert response.finish_reason == "stop"
+
+    def test_batch_reports_all_failures(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test a batch finishes every request and reports failures together."""
+        prompts: list[str] = []
+
+        def fake_completion(**kwargs: Any) -> SimpleNamespace:
+            prompt = kwargs["messages"][-1]["content"]
+            prompts.append(prompt)
+            if prompt != "ok":
+                raise RuntimeError(f"{prompt} exploded")
+            return _fake_completion_response(prompt)
+
+        monkeypatch.setattr(litellm, "completion", fake_completion)
+        backend = LLMBackend(model="test-model")
+
+        with pytest.raises(BackendError, match="2 of 3 requests") as exc_info:
+            backend.generate_batch(
+                [GenerationRequest(prompt=p) for p in ("bad1", "ok", "bad2")]
+            )
+        assert "bad1 exploded" in str(exc_info.value)
+        assert "bad2 exploded" in str(exc_info.value)
+        assert sorted(prompts) == ["bad1", "bad2", "ok"]
+
+    def test_call_settings_can_be_changed(self) -> None:
+        """Test reassigned settings take effect on the next call."""
+        backend = LLMBackend(model="test-model", api_key="key", extra="x")
+        request = GenerationRequest(prompt="hi")
+        assert backend._build_litellm_kwargs(request)["model"] == "test-model"
+
+        backend.model = "other-model"
+        backend.base_url = "http://localhost:11434"
+        backend.add_system_prompt = False
+        backend.kwargs["extra"] = "y"
+        kwargs = backend._build_litellm_kwargs(request)
+
+        assert kwargs["model"] == "other-model"
+        assert kwargs["api_base"] == "http://localhost:11434"
+        assert kwargs["api_key"] == "key"
+        assert kwargs["extra"] == "y"
+        assert [m["role"] for m in kwargs["messages"]] == ["user"]
+
+    def test_zero_temperature_overrides_backend_default(self) -> None:
+        """Test an explicit temperature=0 is not replaced by the backend default."""
+        backend = LLMBackend(model="test-model", temperature=0.9)
+        kwargs = backend._build_litellm_kwargs(
+            GenerationRequest(prompt="a", temperature=0)
+        )
+        assert kwargs["temperature"] == 0
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import json
+
 import pytest
 from genji.exceptions import FilterError
 from genji.filters import (
+    RawJSON,
     html_filter,
     json_filter,
     lower_filter,
@@ -27,6 +30,22 @@ class TestJsonFilter:
         assert json_filter("Line 1\nLine 2") == '"Line 1\\nLine 2"'
         assert json_filter("C:\\path") == '"C:\\\\path"'
 
+    def test_json_escaping_matches_json_dumps(self) -> None:
+        """Test control characters and non-ASCII text match json.dumps."""
+        value = "".join(chr(c) for c in range(0x80)) + "é😀\u2028"
+        assert json_filter(value) == json.dumps(value, ensure_ascii=False)
+        assert json.loads(json_filter(value)) == value
+
+    def test_json_escaping_lone_surrogate(self) -> None:
+        """Test lone surrogates are escaped rather than rejected."""
+        assert json_filter("a\ud800b") == json.dumps("a\ud800b", ensure_ascii=False)
+
+    def test_raw_json_passes_through(self) -> None:
+        """Test RawJSON values are inserted without re-encoding."""
+        result = json_filter(RawJSON('{"a": [1, 2]}'))
+        assert result == '{"a": [1, 2]}'
+        assert type(result) is str
+
 
 class TestHtmlFilter:
     """Tests for HTML filter."""
@@ -56,6 +75,13 @@ class TestYamlFilter:
         assert yaml_filter("key: value") == '"key: value"'
         assert yaml_filter("true") == '"true"'
 
+    def test_yaml_reserved_words_case_insensitive(self) -> None:
+        """Test reserved words are quoted in any case, longer words are not."""
+        for word in ("True", "FALSE", "Null", "yes", "No", "ON", "off"):
+            assert yaml_filter(word) == f'"{word}"'
+        assert yaml_filter("nullable") == "nullable"
+        assert yaml_filter("offset") == "offset"
+
 
 class TestUtilityFilters:
     """Tests for utility filters."""
@@ -64,6 +90,11 @@ class TestUtilityFilters:
         """Test raw filter passes through unchanged."""
         assert raw_filter("<dangerous>") == "<dangerous>"
 
+    def test_str_input_is_not_copied(self) -> None:
+        """Test filters reuse str input instead of converting it again."""
+        value = "already a string"
+        assert raw_filter(value) is value
+
     def test_strip_filter(self) -> None:
         """Test whitespace stripping."""
         assert strip_filter("  hello  ") == "hello"
@@ -80,3 +111,9 @@ class TestUtilityFilters:
         # Test error handling
         with pytest.raises(FilterError, match="must be >= suffix length"):
             truncate_filter("text", 2, suffix="...")
+
+    def test_truncate_filter_defaults(self) -> None:
+        """Test default truncation keeps short strings and caps at 255."""
+        assert truncate_filter("short") == "short"
+        assert truncate_filter("x" * 255) == "x" * 255
+        assert truncate_filter("x" * 300) == "x" * 252 + "..."
@@ -3,9 +3,18 @@
 from __future__ import annotations
 
 import pytest
-from genji.context import RenderContext, set_current_context
+from genji.backends.base import GenerationRequest
+from genji.context import (
+    _PLACEHOLDER_PREFIX,
+    _PLACEHOLDER_SUFFIX,
+    RenderContext,
+    acquire_context,
+    release_context,
+    set_current_context,
+)
 from genji.exceptions import TemplateParseError
-from genji.parser import create_environment, parse_template
+from genji.parser import CONTEXT_VARIABLE, create_environment, parse_template
+from genji.template import Template
 
 
 class TestParser:
@@ -32,6 +41,32 @@ class TestParser:
         finally:
             set_current_context(None)
 
+    def test_gen_uses_context_passed_as_render_variable(self) -> None:
+        """Test gen() prefers the render context passed with the template."""
+        env = create_environment()
+        template = env.from_string(
+            '{% macro ask(q) %}{{ gen(q) }}{% endmacro %}{{ gen("a") }}{{ ask("b") }}'
+        )
+        ctx = RenderContext()
+        template.render({CONTEXT_VARIABLE: ctx})
+        assert [p.prompt for p in ctx.prompts] == ["a", "b"]
+
+    def test_gen_prompt_interpolation(self) -> None:
+        """Test gen() formats braces with render variables, else keeps prompt."""
+        env = create_environment()
+        template = env.from_string(
+            '{{ gen("plain") }}{{ gen("hi {name}") }}{{ gen("{{x}}") }}'
+            '{{ gen("{missing}") }}'
+        )
+        ctx = RenderContext(variables={"name": "Ann"})
+        template.render({CONTEXT_VARIABLE: ctx})
+        assert [p.prompt for p in ctx.prompts] == [
+            "plain",
+            "hi Ann",
+            "{x}",
+            "{missing}",
+        ]
+
     def test_gen_in_loop(self) -> None:
         """Test gen() inside a loop with variable interpolation."""
         env = create_environment()
@@ -49,3 +84,82 @@ class TestParser:
             assert ctx.prompts[1].prompt == "prompt for b"
         finally:
             set_current_context(None)
+
+    def test_released_context_is_reset_for_reuse(self) -> None:
+        """Test a released context comes back from the pool empty."""
+        ctx = acquire_context({"name": "Alice"})
+        ctx.collect_prompt("test")
+        release_context(ctx)
+
+        reused = acquire_context({"name": "Bob"})
+        assert reused is ctx
+        assert reused.counter == 0
+        assert reused.prompts == []
+        assert reused.variables == {"name": "Bob"}
+
+    def test_substitute_all(self) -> None:
+        """Test placeholders are replaced in one pass, unknown ones kept."""
+        ctx = RenderContext()
+        first = ctx.collect_prompt("a")
+        second = ctx.collect_prompt("b")
+        ctx.set_generated(0, "A")
+        ctx.set_generated(1, "B")
+
+        unknown = f"{_PLACEHOLDER_PREFIX}99{_PLACEHOLDER_SUFFIX}"
+        text = f"{first}-{second}-{unknown}"
+        assert ctx.substitute_all(text) == f"A-B-{unknown}"
+        assert ctx.substitute_all(text, ["x", None]) == f"x-{second}-{unknown}"
+
+    def test_placeholder_lookalike_text_is_kept(self) -> None:
+        """Test literal text resembling a placeholder is never substituted."""
+        ctx = RenderContext()
+        ctx.collect_prompt("a")
+        ctx.set_generated(0, "A")
+        assert ctx.substitute_all("GENJI 0 __GENJI_GEN_0__") == (
+            "GENJI 0 __GENJI_GEN_0__"
+        )
+
+    def test_presized_context_trims_unused_slots(self) -> None:
+        """Test pre-sized prompt slots are filled in order and trimmed."""
+        ctx = RenderContext(expected_prompts=2)
+        for prompt in ("a", "b", "c"):
+            ctx.collect_prompt(prompt)
+        ctx.finish_collection()
+        assert [p.prompt for p in ctx.prompts] == ["a", "b", "c"]
+
+        assert [r.prompt for r in ctx.requests] == ["a", "b", "c"]
+
+        ctx = RenderContext(expected_prompts=3)
+        ctx.collect_prompt("a", max_tokens=5, stop=["\n"])
+        ctx.finish_collection()
+        assert [p.prompt for p in ctx.prompts] == ["a"]
+        assert ctx.requests == [
+            GenerationRequest(prompt="a", max_tokens=5, stop=("\n",))
+        ]
+        assert ctx.generated == [None]
+
+    def test_extract_and_inject_filters(self) -> None:
+        """Test filter chains are extracted and source IDs injected in order."""
+        source = (
+            '{{ gen("a", max_tokens=f(1)) | json | truncate(10) }} '
+            '{{gen("b")}} {{ gen("c") | upper }}'
+        )
+        chains, modified = Template._extract_and_inject_filters(source)
+        assert chains == {0: ["json", "truncate"], 1: [], 2: ["upper"]}
+        assert modified == (
+            '{{ gen("a", max_tokens=f(1), __source_id=0) }} '
+            '{{ gen("b", __source_id=1) }} {{ gen("c", __source_id=2) }}'
+        )
+
+    def test_substitute_all_without_placeholders(self) -> None:
+        """Test text without placeholders is returned unchanged."""
+        ctx = RenderContext()
+        text = "no placeholders here"
+        assert ctx.substitute_all(text) is text
+
+    def test_extract_without_gen_returns_source_unchanged(self) -> None:
+        """Test templates without gen() are returned as-is."""
+        source = "Hello {{ name | upper }}"
+        chains, modified = Template._extract_and_inject_filters(source)
+        assert chains == {}
+        assert modified is source
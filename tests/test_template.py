@@ -3,13 +3,17 @@
 from __future__ import annotations
 
 import json
-import tempfile
+from collections.abc import Sequence
 from pathlib import Path
 
+import jinja2
 import pytest
-from genji import Template
+from genji import RawJSON, Template
+from genji.backends.base import GenerationRequest, GenerationResponse
 from genji.backends.mock import MockBackend
-from genji.exceptions import TemplateRenderError
+from genji.exceptions import TemplateParseError, TemplateRenderError
+from genji.filters import FILTERS
+from genji.template import _compile_source
 
 
 class TestTemplateBasics:
@@ -21,6 +25,32 @@ class TestTemplateBasics:
         result = template.render(name="Alice")
         assert result == "Generated: greeting for Alice"
 
+    def test_same_source_reuses_compiled_template(self) -> None:
+        """Test templates built from the same source share compilation."""
+        source = '<h1>{{ gen("a title") | html }}</h1>'
+        first = Template(source, backend=MockBackend(default_response="<a>"))
+        second = Template(source, backend=MockBackend(default_response="<b>"))
+
+        assert first._template is second._template
+        assert first._resolved_chains is second._resolved_chains
+        assert first.render() == "<h1>&lt;a&gt;</h1>"
+        assert second.render() == "<h1>&lt;b&gt;</h1>"
+
+    def test_clear_cache_forces_recompilation(self) -> None:
+        """Test clear_cache() drops previously compiled templates."""
+        source = "{{ gen('a') }} cached"
+        first = Template(source, backend=MockBackend())
+        Template.clear_cache()
+        second = Template(source, backend=MockBackend())
+        assert first._template is not second._template
+        assert second.render() == "[MOCK: a] cached"
+
+    def test_templates_share_environment(self) -> None:
+        """Test templates with different sources share one environment."""
+        first = Template("{{ gen('a') }}", backend=MockBackend())
+        second = Template("{{ gen('b') }} other", backend=MockBackend())
+        assert first._env is second._env
+
 
 class TestTemplateWithFilters:
     """Tests for templates with filters."""
@@ -44,6 +74,53 @@ class TestTemplateWithFilters:
         assert "&lt;script&gt;" in result
         assert "<script>" not in result
 
+    def test_each_gen_uses_its_own_filter_chain(self) -> None:
+        """Test filters apply only to the gen() call they follow."""
+        backend = MockBackend(default_response="<b>")
+        template = Template(
+            '{{ gen("a") | html }} {{ gen("b") }} {{ gen("c") | raw }}',
+            backend=backend,
+            default_filter="json",
+        )
+        assert template.render() == '&lt;b&gt; "<b>" <b>'
+
+    def test_identical_content_filtered_once(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test repeated content through the same chain runs filters once."""
+        calls: list[str] = []
+
+        def counting_upper(value: object) -> str:
+            calls.append(str(value))
+            return str(value).upper()
+
+        monkeypatch.setitem(FILTERS, "upper", counting_upper)
+        backend = MockBackend(default_response="same")
+        template = Template(
+            '{% for i in range(3) %}{{ gen("item {i}") | upper }};{% endfor %}',
+            backend=backend,
+        )
+        assert template.render() == "SAME;SAME;SAME;"
+        assert calls == ["same"]
+
+    def test_jinja_escaping_filters_keep_placeholders(self) -> None:
+        """Test gen() results survive Jinja2's own tojson and urlencode."""
+        backend = MockBackend(default_response="hi")
+        template = Template(
+            '{% set x = gen("a") %}{{ x | tojson }} {{ x | urlencode }}',
+            backend=backend,
+        )
+        assert template.render() == '"hi" hi'
+
+    def test_unfiltered_template_inserts_content_verbatim(self) -> None:
+        """Test templates without any filters insert content unchanged."""
+        backend = MockBackend(default_response="<b>bold</b>")
+        source = '<p>{{ gen("content") }}</p>'
+
+        assert Template(source, backend=backend).render() == "<p><b>bold</b></p>"
+        escaped = Template(source, backend=backend, default_filter="html").render()
+        assert escaped == "<p>&lt;b&gt;bold&lt;/b&gt;</p>"
+
 
 class TestTemplateControlFlow:
     """Tests for templates with Jinja2 control flow."""
@@ -68,28 +145,126 @@ class TestTemplateControlFlow:
         assert len(data["items"]) == 2
         assert "Generated content for a" in data["items"][0]
 
+    def test_backend_keeps_its_batch_after_render(self) -> None:
+        """Test the request list handed to the backend is not reused."""
+        batches: list[Sequence[GenerationRequest]] = []
+
+        class RecordingBackend(MockBackend):
+            def generate_batch(
+                self, requests: Sequence[GenerationRequest]
+            ) -> Sequence[GenerationResponse]:
+                batches.append(requests)
+                return super().generate_batch(requests)
+
+        backend = RecordingBackend()
+        Template('{{ gen("first") }}', backend=backend).render()
+        Template('{{ gen("second") }}', backend=backend).render()
+
+        assert [[r.prompt for r in batch] for batch in batches] == [
+            ["first"],
+            ["second"],
+        ]
+
 
 class TestTemplateFromFile:
     """Tests for loading templates from files."""
 
-    def test_load_from_file(self, mock_backend: MockBackend) -> None:
+    def test_load_from_file(self, mock_backend: MockBackend, tmp_path: Path) -> None:
         """Test loading template from file."""
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".genji", delete=False) as f:
-            f.write('{{ gen("test") }}')
-            f.flush()
-            temp_path = f.name
+        path = tmp_path / "test.genji"
+        path.write_text('{{ gen("test") }}', encoding="utf-8")
 
-        try:
-            template = Template.from_file(temp_path, backend=mock_backend)
-            result = template.render()
-            assert result == "Generated: test"
-        finally:
-            Path(temp_path).unlink()
+        template = Template.from_file(str(path), backend=mock_backend)
+        result = template.render()
+        assert result == "Generated: test"
+
+    def test_detect_filter_from_extension(self) -> None:
+        """Test the default filter is inferred from the file suffix."""
+        detect = Template._detect_filter
+        assert detect(Path("a.json.genji"), None) == "json"
+        assert detect(Path("A.HTML.GENJI"), None) == "html"
+        assert detect(Path("a.xml.genji"), None) == "xml"
+        assert detect(Path("a.yml.genji"), None) == "yaml"
+        assert detect(Path("a.txt.genji"), None) is None
+        assert detect(Path("a.json.genji.bak"), None) is None
+        assert detect(Path("a.json.genji"), "raw") == "raw"
+
+    def test_reload_picks_up_file_changes(self, tmp_path: Path) -> None:
+        """Test reloading an edited file returns the new source."""
+        path = tmp_path / "page.genji"
+        backend = MockBackend()
+        path.write_text("first", encoding="utf-8")
+        assert Template.from_file(path, backend=backend).render() == "first"
+        assert Template.from_file(path, backend=backend).render() == "first"
+
+        path.write_text("second version", encoding="utf-8")
+        assert Template.from_file(path, backend=backend).render() == "second version"
+
+    def test_missing_file(self, tmp_path: Path) -> None:
+        """Test a missing file raises FileNotFoundError naming the path."""
+        path = tmp_path / "missing.genji"
+        with pytest.raises(FileNotFoundError, match="Template file not found"):
+            Template.from_file(path, backend=MockBackend())
+
+
+class TestTemplateBytecodeCache:
+    """Tests for the opt-in on-disk bytecode cache."""
+
+    def test_bytecode_reused_from_cache_dir(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test compiled bytecode is written once and loaded afterwards."""
+        monkeypatch.setenv("GENJI_BYTECODE_CACHE_DIR", str(tmp_path / "bcc"))
+        source = "Hello {{ name }}"
+
+        first = _compile_source(Template._create_environment(), source)
+        assert len(list((tmp_path / "bcc").iterdir())) == 1
+
+        env = Template._create_environment()
+
+        def fail_compile(*args: object, **kwargs: object) -> None:
+            raise AssertionError("source should not be recompiled")
+
+        monkeypatch.setattr(env, "compile", fail_compile)
+        second = _compile_source(env, source)
+        assert first.render(name="A") == second.render(name="A") == "Hello A"
+
+    def test_explicit_bytecode_cache(self) -> None:
+        """Test a bytecode_cache passed to Template stores compiled code."""
+
+        class DictBytecodeCache(jinja2.BytecodeCache):
+            def __init__(self) -> None:
+                self.store: dict[str, bytes] = {}
+
+            def load_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+                if bucket.key in self.store:
+                    bucket.bytecode_from_string(self.store[bucket.key])
+
+            def dump_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+                self.store[bucket.key] = bucket.bytecode_to_string()
+
+        Template.clear_cache()
+        cache = DictBytecodeCache()
+        template = Template(
+            'Hi {{ gen("p") }}', backend=MockBackend(), bytecode_cache=cache
+        )
+        assert len(cache.store) == 1
+        assert template.render() == "Hi [MOCK: p]"
+        Template.clear_cache()
 
 
 class TestTemplateRenderJson:
     """Tests for render_json() method."""
 
+    def test_render_json_with_raw_json_response(self) -> None:
+        """Test RawJSON responses are kept apart from equal plain text."""
+        responses = {"obj": RawJSON('{"n": 1}'), "text": '{"n": 1}'}
+        template = Template(
+            '{"obj": {{ gen("obj") | json }}, "text": {{ gen("text") | json }}}',
+            backend=MockBackend(response_fn=responses.__getitem__),
+        )
+        assert template.render_json() == {"obj": {"n": 1}, "text": '{"n": 1}'}
+
     def test_render_json_parses_output(self) -> None:
         """Test render_json() parses JSON output to dict."""
         backend = MockBackend(default_response="test value")
@@ -105,6 +280,26 @@ class TestTemplateRenderJson:
         with pytest.raises(TemplateRenderError, match="not valid JSON"):
             template.render_json()
 
+    def test_render_json_accepts_stdlib_only_values(self) -> None:
+        """Test values only the standard library parses are still accepted."""
+        template = Template(
+            '{"big": 123456789012345678901234567890, "nan": NaN}',
+            backend=MockBackend(),
+        )
+        data = template.render_json()
+        assert data["big"] == 123456789012345678901234567890
+        assert data["nan"] != data["nan"]
+
+    def test_render_json_keeps_large_integers_exact(self) -> None:
+        """Test integers wider than 64 bits are not rounded to floats."""
+        template = Template(
+            '{"id": 18446744073709551616, "neg": -9223372036854775809}',
+            backend=MockBackend(),
+        )
+        data = template.render_json()
+        assert data == {"id": 18446744073709551616, "neg": -9223372036854775809}
+        assert isinstance(data["id"], int)
+
 
 class TestTemplateErrorHandling:
     """Tests for error handling."""
@@ -123,6 +318,14 @@ class TestTemplateErrorHandling:
         with pytest.raises(TemplateRenderError, match="Backend failed"):
             template.render()
 
+    def test_unknown_filter_rejected_at_construction(self) -> None:
+        """Test misspelled filter names fail when the template is built."""
+        backend = MockBackend()
+        with pytest.raises(TemplateParseError, match="Unknown filter: jsn"):
+            Template('{{ gen("test") | jsn }}', backend=backend)
+        with pytest.raises(TemplateParseError, match="Unknown filter: htm"):
+            Template('{{ gen("test") }}', backend=backend, default_filter="htm")
+
 
 class TestTemplateIntegration:
     """Integration tests matching the success criteria."""